@@ -0,0 +1,204 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.config import ADMISSION_MAX_CONCURRENCY, ADMISSION_SECRET_CONCURRENCY, ADMISSION_DEFAULT_CONCURRENCY, \
+    ADMISSION_LISTING_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    """
+    Класс маршрутов с собственным ограничением одновременных запросов и очереди.
+    Запросы класса с меньшим priority получают освободившееся место раньше.
+    """
+    name: str
+    priority: int
+    max_concurrency: int
+    max_queue: int
+
+
+class Overloaded(Exception):
+    """
+    Запрос не может быть принят: очередь заполнена или время ожидания истекло.
+    """
+
+    def __init__(self, retry_after: float):
+        super().__init__('Сервис перегружен')
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Ограничивает количество одновременно выполняемых запросов воркера.
+
+    Запросы всех классов делят общий лимит total_concurrency, и у каждого класса есть собственный лимит.
+    Запрос, для которого нет места, ждет в очереди не дольше queue_timeout секунд, а если очередь класса
+    заполнена, сразу отклоняется. Освободившееся место получает ожидающий запрос класса с наивысшим
+    приоритетом, поэтому медленные запросы низкого приоритета не задерживают важные.
+    """
+
+    def __init__(self, total_concurrency: int, queue_timeout: float, route_classes: list[RouteClass]):
+        self.total_concurrency = total_concurrency
+        self.queue_timeout = queue_timeout
+        self.route_classes = route_classes
+        self.active_total = 0
+        self.active = {route_class.name: 0 for route_class in route_classes}
+        self.queued = {route_class.name: 0 for route_class in route_classes}
+        self.rejected = {route_class.name: 0 for route_class in route_classes}
+        self._waiters: list[tuple[int, int, RouteClass, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        """
+        Занимает место для запроса, при необходимости дожидаясь его в очереди.
+
+        :param route_class: класс маршрута запроса (тип RouteClass)
+        :raises Overloaded: если очередь заполнена или место не освободилось за queue_timeout секунд
+        """
+        if self._can_run(route_class) and not self._has_priority_waiters(route_class):
+            self._take(route_class)
+            return
+        if self.queued[route_class.name] >= route_class.max_queue:
+            self.rejected[route_class.name] += 1
+            raise Overloaded(self.queue_timeout)
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._counter), route_class, future))
+        self.queued[route_class.name] += 1
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except BaseException:
+            self._abandon(route_class, future)
+            raise
+        if not future.done():
+            self._abandon(route_class, future)
+            self.rejected[route_class.name] += 1
+            raise Overloaded(self.queue_timeout)
+
+    def release(self, route_class: RouteClass) -> None:
+        """
+        Освобождает место и передает его ожидающим запросам в порядке приоритета.
+
+        :param route_class: класс маршрута запроса (тип RouteClass)
+        """
+        self.active_total -= 1
+        self.active[route_class.name] -= 1
+        self._wake()
+
+    def _can_run(self, route_class: RouteClass) -> bool:
+        return self.active_total < self.total_concurrency and \
+            self.active[route_class.name] < route_class.max_concurrency
+
+    def _has_priority_waiters(self, route_class: RouteClass) -> bool:
+        """
+        Проверяет, ждут ли в очереди запросы с тем же или более высоким приоритетом, которые могут выполняться.
+        Ожидающие запросы класса, достигшего собственного лимита, не задерживают запросы других классов.
+
+        :param route_class: класс маршрута запроса (тип RouteClass)
+        :return: True, если такие запросы есть, иначе False
+        """
+        return any(self.queued[other.name] and self._can_run(other)
+                   for other in self.route_classes if other.priority <= route_class.priority)
+
+    def _take(self, route_class: RouteClass) -> None:
+        self.active_total += 1
+        self.active[route_class.name] += 1
+
+    def _abandon(self, route_class: RouteClass, future: asyncio.Future) -> None:
+        """
+        Убирает запрос из очереди. Если место уже было выделено запросу, освобождает его.
+
+        :param route_class: класс маршрута запроса (тип RouteClass)
+        :param future: ожидание места (тип asyncio.Future)
+        """
+        if future.done():
+            self.release(route_class)
+        else:
+            # запись удаляется из кучи при следующем _wake
+            future.cancel()
+            self.queued[route_class.name] -= 1
+
+    def _wake(self) -> None:
+        """
+        Выделяет свободные места ожидающим запросам с наивысшим приоритетом.
+        Запросы классов, достигших собственного лимита, остаются в очереди.
+        """
+        skipped = []
+        while self._waiters and self.active_total < self.total_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            _, _, route_class, future = waiter
+            if future.cancelled():
+                continue
+            if not self._can_run(route_class):
+                skipped.append(waiter)
+                continue
+            self.queued[route_class.name] -= 1
+            self._take(route_class)
+            future.set_result(None)
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+
+SECRET_READS = RouteClass('secret_reads', priority=0, max_concurrency=ADMISSION_SECRET_CONCURRENCY,
+                          max_queue=ADMISSION_QUEUE_SIZE)
+DEFAULT = RouteClass('default', priority=1, max_concurrency=ADMISSION_DEFAULT_CONCURRENCY,
+                     max_queue=ADMISSION_QUEUE_SIZE)
+USER_LISTING = RouteClass('user_listing', priority=2, max_concurrency=ADMISSION_LISTING_CONCURRENCY,
+                          max_queue=ADMISSION_QUEUE_SIZE)
+
+SECRET_READ_PATH = re.compile(r'^/api/secrets/[^/]+/?$')
+USER_LISTING_PATH = re.compile(r'^/api/users/?$')
+
+
+def classify_request(method: str, path: str) -> RouteClass:
+    """
+    Определяет класс маршрута запроса: чтение (и одновременное удаление) секрета, список пользователей
+    или остальные запросы.
+
+    :param method: HTTP-метод (тип str)
+    :param path: путь запроса (тип str)
+    :return: класс маршрута (тип RouteClass)
+    """
+    if method == 'GET' and SECRET_READ_PATH.match(path):
+        return SECRET_READS
+    if method == 'GET' and USER_LISTING_PATH.match(path):
+        return USER_LISTING
+    return DEFAULT
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware, пропускающее HTTP-запросы через AdmissionController.
+    Отклоненный запрос получает ответ 503 с заголовком Retry-After, не дожидаясь пула соединений базы данных.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_QUEUE_TIMEOUT,
+                                                            [SECRET_READS, DEFAULT, USER_LISTING])
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_request(scope['method'], scope['path'])
+        try:
+            await self.controller.acquire(route_class)
+        except Overloaded as exc:
+            response = JSONResponse({'detail': 'Сервис перегружен'}, status_code=503,
+                                    headers={'Retry-After': str(max(1, math.ceil(exc.retry_after)))})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
@@ -0,0 +1,29 @@
+from enum import Enum
+
+from sqlalchemy import Column, BigInteger, Integer, String, Enum as EnumType, DateTime
+
+from src.database import Base
+
+
+class AuditEventType(str, Enum):
+    """
+    Тип события жизненного цикла секрета.
+    """
+    secret_create = 'Создание секрета'
+    secret_read = 'Чтение секрета'
+    secret_expire = 'Истечение срока жизни секрета'
+    user_delete = 'Удаление пользователя'
+
+
+class AuditEvent(Base):
+    """
+    Модель для описания записей журнала аудита.
+    Идентификатор пользователя хранится без внешнего ключа, чтобы записи сохранялись после удаления пользователя,
+    а вместо ключа секрета хранится его хеш.
+    """
+    __tablename__ = 'audit_events'
+    id = Column(BigInteger, primary_key=True)
+    event = Column(EnumType(AuditEventType), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    secret_ref = Column(String(64), nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
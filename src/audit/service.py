@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.audit.models import AuditEvent, AuditEventType
+from src.config import AUDIT_ENABLED, AUDIT_QUEUE_MAXSIZE, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL
+from src.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def audit_row(event: AuditEventType, user_id: Optional[int], secret_key: Optional[bytes] = None,
+              created_at: Optional[datetime] = None) -> dict:
+    """
+    Создает запись журнала аудита. Ключ секрета не сохраняется, вместо него используется его хеш.
+
+    :param event: тип события (тип AuditEventType)
+    :param user_id: идентификатор пользователя (тип int или None)
+    :param secret_key: зашифрованный ключ секрета (тип bytes или None)
+    :param created_at: время события UTC (тип datetime, по умолчанию текущее)
+    :return: данные записи (тип dict)
+    """
+    return {
+        'event': event,
+        'user_id': user_id,
+        'secret_ref': hashlib.sha256(secret_key).hexdigest() if secret_key is not None else None,
+        'created_at': created_at or datetime.utcnow(),
+    }
+
+
+async def insert_audit_rows(db: AsyncSession, rows: list[dict]) -> None:
+    """
+    Записывает пачку записей журнала аудита одним многострочным INSERT без фиксации транзакции.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param rows: данные записей (тип list[dict])
+    """
+    if rows:
+        await db.execute(insert(AuditEvent).values(rows))
+
+
+class AuditLog:
+    """
+    Журнал аудита с ограниченной очередью в памяти процесса и фоновой задачей записи.
+    Запись события не ждет базу данных: фоновая задача сохраняет накопленные события пачкой,
+    когда их набирается batch_size или проходит flush_interval секунд.
+    При переполнении очереди события отбрасываются и учитываются в счетчике dropped.
+    """
+
+    def __init__(self, maxsize: int = AUDIT_QUEUE_MAXSIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, enabled: bool = AUDIT_ENABLED,
+                 session_factory: Callable[[], AsyncSession] = AsyncSessionLocal):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.session_factory = session_factory
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Task] = None
+
+    def record(self, event: AuditEventType, user_id: Optional[int], secret_key: Optional[bytes] = None) -> None:
+        """
+        Ставит событие в очередь на запись, не дожидаясь базы данных.
+
+        :param event: тип события (тип AuditEventType)
+        :param user_id: идентификатор пользователя (тип int или None)
+        :param secret_key: зашифрованный ключ секрета (тип bytes или None)
+        """
+        self.record_many([audit_row(event, user_id, secret_key)])
+
+    def record_many(self, rows: Iterable[dict]) -> None:
+        """
+        Ставит готовые записи в очередь на запись.
+
+        :param rows: данные записей (тип Iterable[dict])
+        """
+        if not self.enabled:
+            return
+        self._ensure_writer()
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % self.maxsize == 0:
+                    logger.warning('Очередь журнала аудита переполнена, отброшено событий: %s', self.dropped)
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую задачу и записывает все накопленные события.
+        При следующей записи события фоновая задача будет запущена снова.
+        """
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        if self._inflight is not None:
+            await self._inflight
+            self._inflight = None
+        while self._queue is not None and not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._write(batch)
+
+    def _ensure_writer(self) -> None:
+        """
+        Запускает фоновую задачу записи в текущем цикле событий, если она еще не запущена.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        """
+        Собирает события в пачки по размеру или по времени и записывает их.
+        """
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                pending, batch = batch, []
+                # остановка не прерывает начатую запись
+                self._inflight = loop.create_task(self._write(pending))
+                await asyncio.shield(self._inflight)
+        except asyncio.CancelledError:
+            if batch:
+                await self._write(batch)
+            raise
+
+    async def _write(self, batch: list[dict]) -> None:
+        """
+        Записывает пачку событий. Ошибка записи не останавливает фоновую задачу.
+
+        :param batch: данные записей (тип list[dict])
+        """
+        try:
+            async with self.session_factory() as session:
+                await insert_audit_rows(session, batch)
+                await session.commit()
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception('Не удалось записать %s событий журнала аудита', len(batch))
+
+
+audit_log = AuditLog()
@@ -0,0 +1,114 @@
+import heapq
+import math
+import time
+from functools import lru_cache
+from typing import Protocol
+
+from src.config import TOKEN_REVOCATION_STORAGE, TOKEN_REVOCATION_REDIS_URL
+
+
+class RevocationStore(Protocol):
+    """
+    Хранилище идентификаторов (jti) отозванных JWT токенов.
+    Запись хранится только до истечения срока жизни токена, поэтому размер хранилища ограничен
+    количеством токенов, отозванных за время их жизни.
+    """
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        Отзывает токен до истечения его срока жизни.
+
+        :param jti: идентификатор токена (тип str)
+        :param expires_at: время истечения срока жизни токена, unix timestamp (тип float)
+        :return: True, если токен отозван этим вызовом, и False, если он уже был отозван
+        """
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        Проверяет, отозван ли токен.
+
+        :param jti: идентификатор токена (тип str)
+        :return: True, если токен отозван, иначе False
+        """
+
+    async def clear(self) -> None:
+        """
+        Удаляет все записи.
+        """
+
+
+class MemoryRevocationStore:
+    """
+    Хранилище отозванных токенов в памяти процесса: словарь для проверки за O(1)
+    и куча сроков жизни для удаления просроченных записей.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+        self._expiry: list[tuple[float, str]] = []
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        self._prune(time.time())
+        if jti in self._revoked:
+            return False
+        self._revoked[jti] = expires_at
+        heapq.heappush(self._expiry, (expires_at, jti))
+        return True
+
+    async def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    async def clear(self) -> None:
+        self._revoked.clear()
+        self._expiry.clear()
+
+    def _prune(self, now: float) -> None:
+        """
+        Удаляет записи токенов, срок жизни которых истек.
+
+        :param now: текущее время, unix timestamp (тип float)
+        """
+        while self._expiry and self._expiry[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry)
+            self._revoked.pop(jti, None)
+
+
+class RedisRevocationStore:
+    """
+    Хранилище отозванных токенов в Redis, общее для всех процессов. Ключи удаляются самим Redis
+    по истечении срока жизни токена.
+    """
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f'revoked_token:{jti}'
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        ttl_ms = max(1, math.ceil((expires_at - time.time()) * 1000))
+        # SET NX атомарен, поэтому при одновременной ротации только один запрос получит True
+        return bool(await self.redis.set(self._key(jti), 1, nx=True, px=ttl_ms))
+
+    async def is_revoked(self, jti: str) -> bool:
+        return await self.redis.exists(self._key(jti)) > 0
+
+    async def clear(self) -> None:
+        async for key in self.redis.scan_iter('revoked_token:*'):
+            await self.redis.delete(key)
+
+
+@lru_cache
+def get_revocation_store() -> RevocationStore:
+    """
+    Создает и возвращает хранилище отозванных токенов, выбранное в настройках TOKEN_REVOCATION_STORAGE.
+
+    :return: хранилище отозванных токенов (тип RevocationStore)
+    """
+    if TOKEN_REVOCATION_STORAGE == 'redis':
+        return RedisRevocationStore(TOKEN_REVOCATION_REDIS_URL)
+    return MemoryRevocationStore()
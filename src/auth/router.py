@@ -4,16 +4,21 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.schemas import Token, RefreshToken
-from src.auth.service import authenticate_user, get_user, create_refresh_token, create_access_token, validate_token
-from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
+from src.auth.service import authenticate_user, get_user, create_refresh_token, create_access_token, \
+    rotate_refresh_token, revoke_token, oauth2_scheme
+from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES, RATE_LIMIT_LOGIN_PER_IP, \
+    RATE_LIMIT_LOGIN_PER_ACCOUNT
 from src.database import get_db
+from src.rate_limit import RateLimiter
 from src.user.models import User
 from src.user.schemas import UserCreate
 
 router = APIRouter()
 
+login_rate_limiter = RateLimiter('login', per_ip=RATE_LIMIT_LOGIN_PER_IP, per_account=RATE_LIMIT_LOGIN_PER_ACCOUNT)
 
-@router.post('/login', response_model=Token,
+
+@router.post('/login', response_model=Token, dependencies=[Depends(login_rate_limiter)],
              summary='Authenticates a user and generates access and refresh tokens.',
              description='This endpoint allows a user to log in by providing their email and password. '
                          'If the credentials are valid, it returns an access token for authentication and '
@@ -25,7 +30,9 @@ async def login_for_access_token(form_data: UserCreate, db: AsyncSession = Depen
     :return: A dictionary containing the generated access token, refresh token, and the token type (bearer).
     :raises HTTPException: If authentication fails, a 401 error will be raised
     with a message indicating incorrect credentials.
+    :raises HTTPException: If the rate limit for the client or the account is exceeded, a 429 error will be raised.
     """
+    await login_rate_limiter.check_account(form_data.email)
     user = await authenticate_user(get_user, form_data.email, form_data.password, db)
     if not user or not isinstance(user, User):
         raise HTTPException(
@@ -48,14 +55,16 @@ async def login_for_access_token(form_data: UserCreate, db: AsyncSession = Depen
 @router.post('/refresh_token', response_model=Token, summary='Refreshes the access and refresh tokens for a user.',
              description='This endpoint accepts a refresh token and generates a new access token and refresh token '
                          'for the user. The access token allows the user to access protected resources, while the '
-                         'refresh token can be used to obtain new access tokens when the current one expires.')
+                         'refresh token can be used to obtain new access tokens when the current one expires. '
+                         'The submitted refresh token is revoked and cannot be used again.')
 async def refresh_token(form_data: RefreshToken, db: AsyncSession = Depends(get_db)):
     """
     :param form_data: The data containing the refresh token.
     :param db: The database session dependency for accessing user data.
     :return: A dictionary containing the new access token, refresh token, and the token type (bearer).
+    :raises HTTPException: If the refresh token is invalid, revoked or already used, a 401 error will be raised.
     """
-    user = await validate_token(db, token=form_data.refresh_token)
+    user = await rotate_refresh_token(db, token=form_data.refresh_token)
 
     access_token_expires = timedelta(minutes=float(ACCESS_TOKEN_EXPIRE_MINUTES))
     access_token = create_access_token(data={"sub": user.email, "fresh": False}, expires_delta=access_token_expires)
@@ -68,3 +77,16 @@ async def refresh_token(form_data: RefreshToken, db: AsyncSession = Depends(get_
         "refresh_token": refresh_token,
         "token_type": "bearer",
     }
+
+
+@router.post('/logout', status_code=204, summary='Revokes the access and refresh tokens of a session.',
+             description='This endpoint revokes the bearer access token and the submitted refresh token, so neither '
+                         'can be used again before it expires.')
+async def logout(form_data: RefreshToken, token: str = Depends(oauth2_scheme)):
+    """
+    :param form_data: The data containing the refresh token.
+    :param token: The bearer access token from the Authorization header.
+    :raises HTTPException: If either token is invalid, a 401 error will be raised.
+    """
+    await revoke_token(token)
+    await revoke_token(form_data.refresh_token)
@@ -1,15 +1,19 @@
+import hmac
+import uuid
 from datetime import timedelta, datetime
-from typing import Callable, Union
+from functools import lru_cache
+from typing import Callable, Optional, Union
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 import jwt
-from passlib.context import CryptContext
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config import SECRET_JWT_KEY, JWT_ALGORITHM
-from src.database import get_db
+from src.auth.revocation import get_revocation_store
+from src.auth.tokens import encode_token, decode_token
+from src.config import PROFILING_ADMIN_TOKEN
+from src.database import get_db, release_session
 from src.user.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
@@ -29,8 +33,8 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
-        to_encode.update({'exp': expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_JWT_KEY, algorithm=JWT_ALGORITHM)
+        to_encode.update({'exp': expire, 'jti': uuid.uuid4().hex, 'type': 'access'})
+        encoded_jwt = encode_token(to_encode)
         return encoded_jwt
     except Exception:
         raise HTTPException(status_code=500, detail='Ошибка при создании токена')
@@ -50,13 +54,27 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None) -> str:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=15)
-        to_encode.update({'exp': expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_JWT_KEY, algorithm=JWT_ALGORITHM)
+        # jti позволяет отозвать конкретный токен, не меняя SECRET_JWT_KEY
+        to_encode.update({'exp': expire, 'jti': uuid.uuid4().hex, 'type': 'refresh'})
+        encoded_jwt = encode_token(to_encode)
         return encoded_jwt
     except Exception:
         raise HTTPException(status_code=500, detail='Ошибка при создании токена')
 
 
+@lru_cache
+def get_password_context():
+    """
+    Создает и возвращает контекст хеширования паролей bcrypt, общий для процесса.
+    passlib загружается при первом хешировании или проверке пароля, а не при запуске приложения.
+
+    :return: контекст хеширования (тип CryptContext)
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=['bcrypt'], deprecated='auto')
+
+
 def verify_password(plain_password, hashed_password) -> bool:
     """
     Верифицирует пароль с зашифрованным паролем.
@@ -65,8 +83,7 @@ def verify_password(plain_password, hashed_password) -> bool:
     :param hashed_password: зашифрованный пароль (тип str)
     :return: True, если пароль верен, иначе False
     """
-    pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_password_context().verify(plain_password, hashed_password)
 
 
 async def get_user(email: str, db: AsyncSession) -> User:
@@ -100,6 +117,19 @@ async def authenticate_user(get_user: Callable, email: str, password: str, db: A
     return user
 
 
+def _credentials_exception() -> HTTPException:
+    """
+    Возвращает ошибку 401 для недействительного токена.
+
+    :return: исключение (тип HTTPException)
+    """
+    return HTTPException(
+        status_code=401,
+        detail='Could not validate credentials',
+        headers={'WWW-Authenticate': 'Bearer'},
+    )
+
+
 async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
     """
     Получает текущего пользователя на основе предоставленного JWT токена.
@@ -108,31 +138,89 @@ async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depe
     :param db: экземпляр сессии базы данных (тип AsyncSession)
     :return: текущий пользователь (тип User)
     """
-    exception = HTTPException(
-        status_code=401,
-        detail='Could not validate credentials',
-        headers={'WWW-Authenticate': 'Bearer'},
-    )
+    exception = _credentials_exception()
     try:
-        decoded_jwt = jwt.decode(token, SECRET_JWT_KEY, algorithms=[JWT_ALGORITHM])
+        decoded_jwt = decode_token(token)
         email = decoded_jwt.get('sub')
-        if email is None:
+        # долгоживущий refresh-токен не принимается вместо access-токена
+        if email is None or decoded_jwt.get('type') != 'access':
             raise exception
     except jwt.PyJWTError:
         raise exception
+    # проверка отзыва не обращается к базе данных
+    jti = decoded_jwt.get('jti')
+    if jti and await get_revocation_store().is_revoked(jti):
+        raise exception
     user = await get_user(email, db)
+    # соединение не удерживается, пока обработчик выполняет работу, не связанную с базой данных
+    await release_session(db)
     if user is None:
         raise exception
     return user
 
 
-async def validate_token(db: AsyncSession, token: str = Depends(oauth2_scheme)):
+async def rotate_refresh_token(db: AsyncSession, token: str) -> User:
     """
-    Валидирует JWT токен и возвращает текущего пользователя.
+    Проверяет refresh-токен, отзывает его и возвращает пользователя, для которого нужно выпустить новые токены.
+    Каждый refresh-токен можно использовать только один раз.
 
     :param db: экземпляр сессии базы данных (тип AsyncSession)
-    :param token: JWT токен, полученный при аутентификации (тип str)
-    :return: текущий пользователь (тип User)
+    :param token: refresh-токен (тип str)
+    :return: пользователь (тип User)
+    :raises HTTPException: если токен недействителен, отозван или уже использован, будет вызвана ошибка 401
     """
-    user = await get_current_user(db, token=token)
+    exception = _credentials_exception()
+    try:
+        decoded_jwt = decode_token(token)
+    except jwt.PyJWTError:
+        raise exception
+    email = decoded_jwt.get('sub')
+    jti = decoded_jwt.get('jti')
+    if email is None or jti is None or decoded_jwt.get('type') != 'refresh':
+        raise exception
+    if not await get_revocation_store().revoke(jti, decoded_jwt['exp']):
+        raise exception
+    user = await get_user(email, db)
+    await release_session(db)
+    if user is None:
+        raise exception
     return user
+
+
+async def revoke_token(token: str) -> None:
+    """
+    Отзывает JWT токен до истечения его срока жизни.
+
+    :param token: JWT токен (тип str)
+    :raises HTTPException: если токен недействителен, будет вызвана ошибка 401
+    """
+    try:
+        decoded_jwt = decode_token(token)
+    except jwt.PyJWTError:
+        raise _credentials_exception()
+    jti = decoded_jwt.get('jti')
+    if jti is not None:
+        await get_revocation_store().revoke(jti, decoded_jwt['exp'])
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """
+    Проверяет административный токен за постоянное время.
+
+    :param token: токен из заголовка запроса (тип str или None)
+    :return: True, если токен задан в настройках и совпадает, иначе False
+    """
+    if not PROFILING_ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILING_ADMIN_TOKEN.encode())
+
+
+async def verify_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Зависимость для административных эндпоинтов, проверяющая заголовок X-Admin-Token.
+
+    :param x_admin_token: административный токен из заголовка X-Admin-Token (тип str или None)
+    :raises HTTPException: если токен не совпадает, будет вызвана ошибка 403
+    """
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail='Недостаточно прав')
@@ -0,0 +1,157 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+
+from src.config import SECRET_JWT_KEY, JWT_ALGORITHM, JWT_PRIVATE_KEY_PATH, JWT_PUBLIC_KEY_PATH, \
+    JWT_DECODE_CACHE_SIZE
+
+# алгоритмы с парой ключей: токены подписываются закрытым ключом, а проверяются открытым,
+# поэтому другим сервисам для проверки токенов не нужен общий секрет
+ASYMMETRIC_ALGORITHMS = ('EdDSA', 'ES256', 'ES384', 'ES512', 'RS256', 'RS384', 'RS512', 'PS256', 'PS384', 'PS512')
+
+
+@dataclass(frozen=True)
+class JWTKeys:
+    """
+    Подготовленные ключи для подписи и проверки JWT токенов.
+    """
+    algorithm: str
+    signing_key: Any
+    verification_key: Any
+
+    @property
+    def algorithms(self) -> list[str]:
+        """
+        Список разрешенных при проверке алгоритмов.
+        """
+        return [self.algorithm]
+
+
+def _read_file(path: Optional[str]) -> Optional[bytes]:
+    """
+    Читает файл с ключом, если путь задан.
+
+    :param path: путь к файлу (тип str или None)
+    :return: содержимое файла или None (тип bytes или None)
+    """
+    if not path:
+        return None
+    with open(path, 'rb') as key_file:
+        return key_file.read()
+
+
+@lru_cache
+def get_jwt_keys() -> JWTKeys:
+    """
+    Один раз загружает и подготавливает ключи JWT из настроек.
+    Для асимметричных алгоритмов PEM-файлы разбираются в объекты ключей, поэтому при каждой проверке
+    токена ключ не разбирается заново. Сервису, который только проверяет токены, достаточно открытого ключа.
+
+    :return: подготовленные ключи (тип JWTKeys)
+    """
+    if JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return JWTKeys(algorithm=JWT_ALGORITHM, signing_key=SECRET_JWT_KEY, verification_key=SECRET_JWT_KEY)
+
+    private_pem = _read_file(JWT_PRIVATE_KEY_PATH)
+    public_pem = _read_file(JWT_PUBLIC_KEY_PATH)
+    signing_key = load_pem_private_key(private_pem, password=None) if private_pem else None
+    if public_pem:
+        verification_key = load_pem_public_key(public_pem)
+    elif signing_key is not None:
+        verification_key = signing_key.public_key()
+    else:
+        raise RuntimeError(f'Для алгоритма {JWT_ALGORITHM} нужен JWT_PUBLIC_KEY_PATH или JWT_PRIVATE_KEY_PATH')
+    return JWTKeys(algorithm=JWT_ALGORITHM, signing_key=signing_key, verification_key=verification_key)
+
+
+class DecodedTokenCache:
+    """
+    LRU-кэш проверенных JWT токенов: ключ - хеш токена, значение - его данные.
+    Запись действительна до истечения срока жизни токена (exp).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        """
+        Хеширует токен, чтобы не хранить его в памяти целиком.
+
+        :param token: JWT токен (тип str)
+        :return: хеш токена (тип bytes)
+        """
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Возвращает данные токена, если он есть в кэше и его срок жизни не истек.
+
+        :param token: JWT токен (тип str)
+        :return: данные токена или None (тип dict или None)
+        """
+        key = self._key(token)
+        claims = self._entries.get(key)
+        if claims is None:
+            return None
+        if claims.get('exp', 0) <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        """
+        Сохраняет данные проверенного токена.
+
+        :param token: JWT токен (тип str)
+        :param claims: данные токена (тип dict)
+        """
+        if self.maxsize <= 0 or 'exp' not in claims:
+            return
+        self._entries[self._key(token)] = claims
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        self._entries.clear()
+
+
+decoded_token_cache = DecodedTokenCache(JWT_DECODE_CACHE_SIZE)
+
+
+def encode_token(claims: dict) -> str:
+    """
+    Подписывает данные токена подготовленным ключом.
+
+    :param claims: данные токена (тип dict)
+    :return: JWT токен (тип str)
+    """
+    keys = get_jwt_keys()
+    return jwt.encode(claims, keys.signing_key, algorithm=keys.algorithm)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Проверяет JWT токен и возвращает его данные, используя кэш проверенных токенов.
+
+    :param token: JWT токен (тип str)
+    :return: данные токена (тип dict)
+    :raises jwt.PyJWTError: если токен недействителен
+    """
+    claims = decoded_token_cache.get(token)
+    if claims is None:
+        keys = get_jwt_keys()
+        claims = jwt.decode(token, keys.verification_key, algorithms=keys.algorithms)
+        decoded_token_cache.put(token, claims)
+    return claims
@@ -0,0 +1,104 @@
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import REQUEST_MAX_BODY_SIZE, SECRET_REQUEST_MAX_BODY_SIZE
+
+# ограничения размера тела для отдельных маршрутов: метод, шаблон пути и размер в байтах
+ROUTE_BODY_LIMITS = [
+    ('POST', re.compile(r'^/api/generate/?$'), SECRET_REQUEST_MAX_BODY_SIZE),
+]
+
+
+class RequestTooLarge(Exception):
+    """
+    Тело запроса превышает ограничение маршрута.
+    """
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware, ограничивающее размер тела HTTP-запроса до его разбора.
+
+    Запрос с заголовком Content-Length больше ограничения маршрута отклоняется, не читая тело.
+    Для остальных запросов полученные части тела считаются по мере поступления, и как только их размер
+    превысит ограничение, клиент получает ответ 413, а приложение - исключение вместо следующей части.
+    Поэтому в памяти оказывается не больше ограничения и одной части тела.
+    """
+
+    def __init__(self, app: ASGIApp, default_limit: int = REQUEST_MAX_BODY_SIZE,
+                 route_limits: Optional[list[tuple[str, re.Pattern, int]]] = None):
+        self.app = app
+        self.default_limit = default_limit
+        self.route_limits = ROUTE_BODY_LIMITS if route_limits is None else route_limits
+
+    def limit_for(self, method: str, path: str) -> int:
+        """
+        Возвращает ограничение размера тела для маршрута.
+
+        :param method: HTTP-метод (тип str)
+        :param path: путь запроса (тип str)
+        :return: размер в байтах (тип int)
+        """
+        for route_method, pattern, limit in self.route_limits:
+            if method == route_method and pattern.match(path):
+                return limit
+        return self.default_limit
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope['method'], scope['path'])
+        content_length = Headers(scope=scope).get('content-length')
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    if not rejected and not response_started:
+                        await self._reject(scope, receive, send)
+                    rejected = True
+                    raise RequestTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            # ответ приложения на прерванное чтение тела не отправляется после ответа 413
+            if rejected:
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except RequestTooLarge:
+            # ответ 413 уже отправлен
+            pass
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Отправляет ответ 413. Соединение закрывается, чтобы клиент не отправлял оставшуюся часть тела.
+
+        :param scope: параметры запроса ASGI (тип Scope)
+        :param receive: получение сообщений запроса (тип Receive)
+        :param send: отправка сообщений ответа (тип Send)
+        """
+        response = JSONResponse({'detail': 'Тело запроса слишком большое'}, status_code=413,
+                                headers={'Connection': 'close'})
+        await response(scope, receive, send)
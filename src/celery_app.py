@@ -1,13 +1,14 @@
 from celery import Celery
 
 from src.config import CELERY_BROKER_URL, CELERY_BACKEND_URL
-from tasks.tasks import burn_secret    # noqa
 
 
 def make_celery():
     """
     Создает и настраивает экземпляр Celery.
-    Устанавливает расписание для периодической задачи burn_secret.
+    Устанавливает расписание для периодических задач burn_secret и maintain_secret_partitions.
+    Модули задач импортируются только воркером при запуске, поэтому beat и команды управления
+    не загружают SQLAlchemy и код приложения.
     :return: экземпляр Celery
     """
     celery = Celery(
@@ -21,6 +22,10 @@ def make_celery():
         'burn_secret': {
             'task': 'tasks.tasks.burn_secret',
             'schedule': 60.0
+        },
+        'maintain_secret_partitions': {
+            'task': 'tasks.tasks.maintain_secret_partitions',
+            'schedule': 3600.0
         }
     }
 
@@ -12,6 +12,13 @@ POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD')
 POSTGRES_HOST = os.getenv('POSTGRES_HOST')
 POSTGRES_PORT = os.getenv('POSTGRES_PORT')
 
+# реплики только для чтения: полные URL SQLAlchemy через запятую
+POSTGRES_REPLICA_URLS = [url for url in os.getenv('POSTGRES_REPLICA_URLS', '').split(',') if url]
+POSTGRES_REPLICA_CONNECT_TIMEOUT = float(os.getenv('POSTGRES_REPLICA_CONNECT_TIMEOUT', '2'))
+
+# шарды таблиц секретов: полные URL SQLAlchemy через запятую, пустой список - секреты хранятся в основной базе
+SECRET_SHARD_URLS = [url for url in os.getenv('SECRET_SHARD_URLS', '').split(',') if url]
+
 POSTGRES_DB_TEST = os.getenv('POSTGRES_DB_TEST')
 
 # Security
@@ -19,7 +26,84 @@ SECRET_JWT_KEY = os.getenv('SECRET_JWT_KEY')
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM')
 ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv('ACCESS_TOKEN_EXPIRE_MINUTES')
 REFRESH_TOKEN_EXPIRE_MINUTES = os.getenv('REFRESH_TOKEN_EXPIRE_MINUTES')
+# PEM-файлы ключей для асимметричных алгоритмов (EdDSA, ES256 и другие)
+JWT_PRIVATE_KEY_PATH = os.getenv('JWT_PRIVATE_KEY_PATH')
+JWT_PUBLIC_KEY_PATH = os.getenv('JWT_PUBLIC_KEY_PATH')
+JWT_DECODE_CACHE_SIZE = int(os.getenv('JWT_DECODE_CACHE_SIZE', '10000'))
 
 # Celery
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
 CELERY_BACKEND_URL = os.getenv('CELERY_BACKEND_URL')
+CELERY_DB_POOL_SIZE = int(os.getenv('CELERY_DB_POOL_SIZE', '2'))
+
+# Token revocation
+TOKEN_REVOCATION_STORAGE = os.getenv('TOKEN_REVOCATION_STORAGE', 'memory')
+TOKEN_REVOCATION_REDIS_URL = os.getenv('TOKEN_REVOCATION_REDIS_URL', CELERY_BROKER_URL)
+
+# Secrets
+NEGATIVE_CACHE_TTL = float(os.getenv('NEGATIVE_CACHE_TTL', '300'))
+NEGATIVE_CACHE_MAXSIZE = int(os.getenv('NEGATIVE_CACHE_MAXSIZE', '100000'))
+SECRET_STORAGE = os.getenv('SECRET_STORAGE', 'postgres')
+SECRET_PARTITION_DAYS_AHEAD = int(os.getenv('SECRET_PARTITION_DAYS_AHEAD', '16'))
+SECRET_HOT_TIER_ENABLED = os.getenv('SECRET_HOT_TIER_ENABLED', 'False').lower() == 'true'
+SECRET_HOT_TIER_REDIS_URL = os.getenv('SECRET_HOT_TIER_REDIS_URL', CELERY_BROKER_URL)
+SECRET_HOT_TIER_LIFETIMES = os.getenv('SECRET_HOT_TIER_LIFETIMES', 'five_min,one_hour').split(',')
+# 0 отключает ограничение
+SECRET_QUOTA_MAX_COUNT = int(os.getenv('SECRET_QUOTA_MAX_COUNT', '1000'))
+SECRET_QUOTA_MAX_BYTES = int(os.getenv('SECRET_QUOTA_MAX_BYTES', '10485760'))
+# наибольший размер содержимого одного секрета пользователя в байтах
+SECRET_QUOTA_MAX_SECRET_SIZE = int(os.getenv('SECRET_QUOTA_MAX_SECRET_SIZE', '65536'))
+
+# Idempotency
+IDEMPOTENCY_STORAGE = os.getenv('IDEMPOTENCY_STORAGE', 'memory')
+IDEMPOTENCY_REDIS_URL = os.getenv('IDEMPOTENCY_REDIS_URL', CELERY_BROKER_URL)
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+IDEMPOTENCY_MEMORY_MAX_KEYS = int(os.getenv('IDEMPOTENCY_MEMORY_MAX_KEYS', '100000'))
+
+# Audit log
+AUDIT_ENABLED = os.getenv('AUDIT_ENABLED', 'True').lower() == 'true'
+AUDIT_QUEUE_MAXSIZE = int(os.getenv('AUDIT_QUEUE_MAXSIZE', '10000'))
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1'))
+
+# Rate limiting
+RATE_LIMIT_STORAGE = os.getenv('RATE_LIMIT_STORAGE', 'memory')
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', CELERY_BROKER_URL)
+RATE_LIMIT_MEMORY_MAX_KEYS = int(os.getenv('RATE_LIMIT_MEMORY_MAX_KEYS', '100000'))
+RATE_LIMIT_LOGIN_PER_IP = os.getenv('RATE_LIMIT_LOGIN_PER_IP', '30/minute')
+RATE_LIMIT_LOGIN_PER_ACCOUNT = os.getenv('RATE_LIMIT_LOGIN_PER_ACCOUNT', '5/minute')
+RATE_LIMIT_USER_CREATE_PER_IP = os.getenv('RATE_LIMIT_USER_CREATE_PER_IP', '10/minute')
+RATE_LIMIT_USER_CREATE_PER_ACCOUNT = os.getenv('RATE_LIMIT_USER_CREATE_PER_ACCOUNT', '3/minute')
+
+# Admission control
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true'
+ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', '64'))
+ADMISSION_SECRET_CONCURRENCY = int(os.getenv('ADMISSION_SECRET_CONCURRENCY', '64'))
+ADMISSION_DEFAULT_CONCURRENCY = int(os.getenv('ADMISSION_DEFAULT_CONCURRENCY', '32'))
+ADMISSION_LISTING_CONCURRENCY = int(os.getenv('ADMISSION_LISTING_CONCURRENCY', '4'))
+ADMISSION_QUEUE_SIZE = int(os.getenv('ADMISSION_QUEUE_SIZE', '128'))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '2'))
+
+# Request size limits
+# наибольший размер тела запроса в байтах, проверяется при получении тела до разбора JSON
+REQUEST_MAX_BODY_SIZE = int(os.getenv('REQUEST_MAX_BODY_SIZE', '16384'))
+# тело запроса создания секрета: содержимое секрета с запасом на экранирование в JSON
+SECRET_REQUEST_MAX_BODY_SIZE = int(os.getenv('SECRET_REQUEST_MAX_BODY_SIZE', '262144'))
+
+# Server
+SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '8000'))
+# 0 - по количеству доступных ядер
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '0'))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+
+# Startup profiling
+# отчет о времени импорта модулей и инициализации при запуске сервера
+STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'False').lower() == 'true'
+STARTUP_PROFILE_TOP = int(os.getenv('STARTUP_PROFILE_TOP', '30'))
+
+# Profiling
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_ADMIN_TOKEN = os.getenv('PROFILING_ADMIN_TOKEN')
+PROFILING_OUTPUT_DIR = os.getenv('PROFILING_OUTPUT_DIR', '/tmp/profiles')
+PROFILING_MAX_SAMPLE_SECONDS = int(os.getenv('PROFILING_MAX_SAMPLE_SECONDS', '60'))
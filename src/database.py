@@ -1,22 +1,140 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 
-from src.config import POSTGRES_DB, POSTGRES_PASSWORD, POSTGRES_USER, POSTGRES_HOST, POSTGRES_PORT
+from src.config import POSTGRES_DB, POSTGRES_PASSWORD, POSTGRES_USER, POSTGRES_HOST, POSTGRES_PORT, \
+    POSTGRES_REPLICA_URLS, POSTGRES_REPLICA_CONNECT_TIMEOUT, SECRET_SHARD_URLS
 
 
 DATABASE_URL = f'postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}'
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
+# движки создаются в init_engines при запуске процесса приложения, а не при импорте модуля,
+# поэтому процессы, которым они не нужны (воркеры Celery, миграции), не загружают драйвер базы данных
+engine: Optional[AsyncEngine] = None
+AsyncSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+# реплики только для чтения
+replica_engines: list[AsyncEngine] = []
+_replica_counter = itertools.count()
+
+# шарды таблиц секретов
+shard_engines: list[AsyncEngine] = []
+ShardSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+def init_engines() -> None:
+    """
+    Создает движки основной базы данных, реплик и шардов секретов, если они еще не созданы.
+    Соединения открываются только при первом запросе.
+    """
+    global engine, replica_engines, shard_engines
+    if engine is not None:
+        return
+    engine = create_async_engine(DATABASE_URL, echo=True)
+    AsyncSessionLocal.configure(bind=engine)
+    replica_engines = [create_async_engine(url, echo=True, pool_pre_ping=True,
+                                           connect_args={'timeout': POSTGRES_REPLICA_CONNECT_TIMEOUT})
+                       for url in POSTGRES_REPLICA_URLS]
+    shard_engines = [create_async_engine(url, echo=True, pool_pre_ping=True) for url in SECRET_SHARD_URLS]
+
+
+def load_database_driver() -> None:
+    """
+    Импортирует драйвер базы данных, не создавая движков.
+    Сервер вызывает функцию до fork, чтобы воркеры не загружали драйвер каждый по отдельности.
+    """
+    make_url(DATABASE_URL).get_dialect().import_dbapi()
+
+
+async def dispose_engines() -> None:
+    """
+    Закрывает соединения всех движков. При следующем вызове init_engines движки будут созданы заново.
+    """
+    global engine, replica_engines, shard_engines
+    if engine is None:
+        return
+    for db_engine in (engine, *replica_engines, *shard_engines):
+        await db_engine.dispose()
+    engine, replica_engines, shard_engines = None, [], []
+    AsyncSessionLocal.configure(bind=None)
+
+
+class ReadSession(Session):
+    """
+    Сессия для чтения, которая выбирает реплику только при первом запросе к базе данных.
+    Реплики выбираются по кругу; если реплика недоступна, пробуется следующая, а затем основная база данных.
+    """
+
+    _read_bind = None
+
+    def get_bind(self, *args, **kwargs):
+        if self._read_bind is None:
+            self._read_bind = self._choose_bind()
+        return self._read_bind
+
+    @staticmethod
+    def _choose_bind():
+        """
+        Выбирает первую доступную реплику, начиная со следующей по кругу, или основную базу данных.
+
+        :return: синхронный движок выбранной базы данных
+        """
+        start = next(_replica_counter)
+        for offset in range(len(replica_engines)):
+            replica_engine = replica_engines[(start + offset) % len(replica_engines)].sync_engine
+            try:
+                # проверенное соединение возвращается в пул и сразу используется запросом
+                with replica_engine.connect():
+                    return replica_engine
+            except (OSError, asyncio.TimeoutError, SQLAlchemyError):
+                continue
+        return engine.sync_engine
+
+
+ReadSessionLocal = sessionmaker(class_=AsyncSession, sync_session_class=ReadSession, expire_on_commit=False,
+                                autoflush=False)
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Создает и возвращает экземпляр сессии базы данных.
+    Соединение берется из пула только при первом запросе к базе данных.
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Создает и возвращает экземпляр сессии реплики для эндпоинтов, допускающих слегка устаревшие данные.
+    """
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+async def get_shard_dbs() -> AsyncGenerator[list[AsyncSession], None]:
+    """
+    Создает и возвращает экземпляры сессий всех шардов секретов.
+    Соединение шарда берется из пула только при первом запросе к нему.
+    """
+    async with AsyncExitStack() as stack:
+        yield [await stack.enter_async_context(ShardSessionLocal(bind=shard_engine)) for shard_engine in shard_engines]
+
+
+async def release_session(db: AsyncSession) -> None:
+    """
+    Завершает транзакцию сессии и возвращает соединение в пул, не дожидаясь завершения запроса.
+    Загруженные объекты остаются доступными, а сессию можно использовать снова.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    """
+    await db.close()
@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional, Protocol
+
+from fastapi import HTTPException
+
+from src.config import IDEMPOTENCY_STORAGE, IDEMPOTENCY_REDIS_URL, IDEMPOTENCY_TTL, IDEMPOTENCY_MEMORY_MAX_KEYS
+
+# длина отпечатка запроса sha256 в начале сохраненного значения
+FINGERPRINT_SIZE = 32
+
+
+def request_fingerprint(body: bytes) -> bytes:
+    """
+    Возвращает отпечаток тела запроса, чтобы отличать повтор запроса от другого запроса с тем же ключом.
+
+    :param body: тело запроса (тип bytes)
+    :return: отпечаток (тип bytes)
+    """
+    return hashlib.sha256(body).digest()
+
+
+class IdempotencyStorage(Protocol):
+    """
+    Хранилище ответов по ключам идемпотентности.
+    Значение - отпечаток запроса и тело ответа, записанные подряд.
+    """
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Возвращает сохраненное значение.
+
+        :param key: ключ идемпотентности (тип str)
+        :return: значение, пустая строка, если запрос еще выполняется, или None (тип bytes или None)
+        """
+
+    async def reserve(self, key: str) -> bool:
+        """
+        Отмечает, что запрос с ключом начал выполняться.
+
+        :param key: ключ идемпотентности (тип str)
+        :return: True, если ключ свободен, иначе False
+        """
+
+    async def put(self, key: str, value: bytes) -> None:
+        """
+        Сохраняет значение на время IDEMPOTENCY_TTL.
+
+        :param key: ключ идемпотентности (тип str)
+        :param value: значение (тип bytes)
+        """
+
+    async def release(self, key: str) -> None:
+        """
+        Освобождает ключ запроса, который завершился ошибкой, чтобы его можно было повторить.
+
+        :param key: ключ идемпотентности (тип str)
+        """
+
+    async def clear(self) -> None:
+        """
+        Удаляет все значения.
+        """
+
+
+class MemoryIdempotencyStorage:
+    """
+    Хранилище в памяти процесса. Все записи живут одинаковое время, поэтому устаревшие и лишние записи
+    вытесняются с начала словаря.
+    Одновременные запросы процесса объединяются в IdempotencyCache, поэтому резервирование не требуется.
+    """
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MEMORY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    async def reserve(self, key: str) -> bool:
+        return True
+
+    async def put(self, key: str, value: bytes) -> None:
+        now = time.monotonic()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_keys:
+                break
+            del self._entries[oldest_key]
+
+    async def release(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisIdempotencyStorage:
+    """
+    Хранилище в Redis, общее для всех процессов. На время выполнения запроса ключ резервируется
+    пустым значением через SET NX, поэтому повтор, пришедший в другой процесс, не выполняется дважды.
+    """
+
+    # время, на которое резервируется ключ, если процесс завершится, не освободив его
+    PENDING_TTL = 60
+
+    def __init__(self, url: str, ttl: int = IDEMPOTENCY_TTL):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f'idempotency:{key}'
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(self._key(key))
+
+    async def reserve(self, key: str) -> bool:
+        return bool(await self.redis.set(self._key(key), b'', nx=True, ex=self.PENDING_TTL))
+
+    async def put(self, key: str, value: bytes) -> None:
+        await self.redis.set(self._key(key), value, ex=self.ttl)
+
+    async def release(self, key: str) -> None:
+        await self.redis.delete(self._key(key))
+
+    async def clear(self) -> None:
+        async for key in self.redis.scan_iter('idempotency:*'):
+            await self.redis.delete(key)
+
+
+@lru_cache
+def get_idempotency_storage() -> IdempotencyStorage:
+    """
+    Создает и возвращает хранилище ответов, выбранное в настройках IDEMPOTENCY_STORAGE.
+
+    :return: хранилище ответов (тип IdempotencyStorage)
+    """
+    if IDEMPOTENCY_STORAGE == 'redis':
+        return RedisIdempotencyStorage(IDEMPOTENCY_REDIS_URL)
+    return MemoryIdempotencyStorage()
+
+
+class IdempotencyCache:
+    """
+    Выполняет обработчик не больше одного раза для ключа идемпотентности.
+
+    Повтор запроса получает сохраненный ответ, не выполняя обработчик. Одновременные запросы с одним ключом
+    в процессе ждут результата первого запроса. Сохраняются только успешные ответы: если обработчик
+    завершился ошибкой, ключ освобождается и запрос можно повторить.
+    """
+
+    def __init__(self, storage_factory: Callable[[], IdempotencyStorage] = get_idempotency_storage):
+        self.storage_factory = storage_factory
+        self._inflight: dict[str, tuple[bytes, asyncio.Future]] = {}
+
+    async def run(self, key: str, fingerprint: bytes, produce: Callable[[], Awaitable[bytes]]) -> tuple[bytes, bool]:
+        """
+        Возвращает ответ для ключа идемпотентности, выполняя обработчик только для первого запроса.
+
+        :param key: ключ идемпотентности с областью действия, например идентификатором пользователя (тип str)
+        :param fingerprint: отпечаток тела запроса (тип bytes)
+        :param produce: обработчик, возвращающий тело ответа (тип Callable)
+        :return: тело ответа и признак повтора (тип tuple[bytes, bool])
+        :raises HTTPException: если ключ использован для другого запроса, будет вызвана ошибка 422,
+        а если запрос с ключом выполняется в другом процессе - ошибка 409
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._check_fingerprint(inflight[0], fingerprint)
+            return await asyncio.shield(inflight[1]), True
+
+        # запрос регистрируется до первого await, чтобы одновременные повторы его дождались
+        future = asyncio.get_running_loop().create_future()
+        # ошибка первого запроса передается ожидающим, а если их нет - не выводится в лог
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = (fingerprint, future)
+        storage = self.storage_factory()
+        try:
+            stored = await storage.get(key)
+            if stored:
+                self._check_fingerprint(stored[:FINGERPRINT_SIZE], fingerprint)
+                body, replayed = stored[FINGERPRINT_SIZE:], True
+            else:
+                if stored is not None or not await storage.reserve(key):
+                    raise HTTPException(status_code=409,
+                                        detail='Запрос с этим ключом идемпотентности уже выполняется')
+                try:
+                    body = await produce()
+                except BaseException:
+                    await storage.release(key)
+                    raise
+                await storage.put(key, fingerprint + body)
+                replayed = False
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(exc)
+            raise
+        else:
+            future.set_result(body)
+            return body, replayed
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _check_fingerprint(stored: bytes, fingerprint: bytes) -> None:
+        """
+        Проверяет, что ключ идемпотентности повторно используется для того же запроса.
+
+        :param stored: сохраненный отпечаток запроса (тип bytes)
+        :param fingerprint: отпечаток текущего запроса (тип bytes)
+        :raises HTTPException: если отпечатки отличаются, будет вызвана ошибка 422
+        """
+        if stored != fingerprint:
+            raise HTTPException(status_code=422, detail='Ключ идемпотентности использован для другого запроса')
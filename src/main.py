@@ -1,16 +1,74 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi_pagination import add_pagination
 from starlette.middleware.cors import CORSMiddleware
 
+from src.admission import AdmissionControlMiddleware
+from src.body_limit import BodySizeLimitMiddleware
+from src.audit.service import audit_log
+from src.auth.revocation import get_revocation_store
+from src.auth.tokens import get_jwt_keys
+from src.config import PROFILING_ENABLED, ADMISSION_ENABLED, STARTUP_PROFILE
+from src.database import init_engines, dispose_engines
+from src.idempotency import get_idempotency_storage
+from src.rate_limit import get_rate_limit_storage
+from src.responses import DefaultJSONResponse
 from src.user import router as user_router
 from src.secret import router as secret_router
 from src.auth import router as auth_router
+from src.secret.storage import close_redis_storage
+from src.startup_profile import startup_profiler
+
+
+async def close_redis_clients() -> None:
+    """
+    Закрывает соединения хранилищ в Redis, созданных процессом.
+    """
+    for get_storage in (get_rate_limit_storage, get_revocation_store, get_idempotency_storage):
+        if get_storage.cache_info().currsize:
+            client = getattr(get_storage(), 'redis', None)
+            if client is not None:
+                await client.aclose()
+            get_storage.cache_clear()
+    await close_redis_storage()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Управляет ресурсами процесса приложения.
+    Движки базы данных создаются при запуске воркера, уже после fork, поэтому каждый воркер открывает
+    собственные соединения, а импорт приложения их не создает. Ключи JWT разбираются при запуске, чтобы ошибка
+    в их настройке останавливала запуск, а не первый вход пользователя. При остановке, после завершения текущих
+    запросов, записывает оставшиеся события журнала аудита и закрывает пулы соединений.
+    """
+    with startup_profiler.step('JWT keys'):
+        get_jwt_keys()
+    with startup_profiler.step('database engines'):
+        init_engines()
+    if STARTUP_PROFILE:
+        print(f'Запуск воркера {os.getpid()}\n{startup_profiler.report(top=0)}', file=sys.stderr)
+    yield
+    await audit_log.stop()
+    await close_redis_clients()
+    await dispose_engines()
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=DefaultJSONResponse, lifespan=lifespan)
 
 add_pagination(app)
 
+if ADMISSION_ENABLED:
+    # добавляется до CORS, чтобы ответы 503 тоже получали заголовки CORS
+    app.add_middleware(AdmissionControlMiddleware)
+
+# размер тела проверяется до очереди admission control, чтобы слишком большие запросы не занимали место
+app.add_middleware(BodySizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
@@ -22,3 +80,10 @@ app.add_middleware(
 app.include_router(user_router.router, prefix='/api', tags=['user'])
 app.include_router(secret_router.router, prefix='/api', tags=['secret'])
 app.include_router(auth_router.router, prefix='/api/auth', tags=['auth'])
+
+if PROFILING_ENABLED:
+    from src.profiling import router as profiling_router
+    from src.profiling.middleware import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiling_router.router, prefix='/api/debug', tags=['debug'])
@@ -6,6 +6,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from src.database import DATABASE_URL, Base
+from src.audit.models import AuditEvent  # noqa
 from src.user.models import User   # noqa
 from src.secret.models import Secret  # noqa
 
@@ -0,0 +1,36 @@
+"""add audit events
+
+Revision ID: 4c1e8a9b2d7f
+Revises: 930daf704e90
+Create Date: 2026-10-19 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e8a9b2d7f'
+down_revision: Union[str, None] = '930daf704e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('audit_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('event', sa.Enum('secret_create', 'secret_read', 'secret_expire', 'user_delete', name='auditeventtype'), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('secret_ref', sa.String(length=64), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_events_created_at'), 'audit_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_audit_events_created_at'), table_name='audit_events')
+    op.drop_table('audit_events')
+    sa.Enum(name='auditeventtype').drop(op.get_bind(), checkfirst=False)
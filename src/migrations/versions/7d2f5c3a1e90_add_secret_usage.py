@@ -0,0 +1,40 @@
+"""add secret usage counters
+
+Revision ID: 7d2f5c3a1e90
+Revises: 4c1e8a9b2d7f
+Create Date: 2026-10-19 20:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2f5c3a1e90'
+down_revision: Union[str, None] = '4c1e8a9b2d7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('secret_usage',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('secret_count', sa.Integer(), nullable=False),
+    sa.Column('total_bytes', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # счетчики для уже существующих секретов
+    op.execute("""
+        INSERT INTO secret_usage (user_id, secret_count, total_bytes)
+        SELECT user_id, count(*), sum(length(secret_content))
+        FROM secrets
+        WHERE user_id IS NOT NULL
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('secret_usage')
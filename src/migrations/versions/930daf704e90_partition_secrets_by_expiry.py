@@ -0,0 +1,95 @@
+"""partition secrets by expiry day
+
+Revision ID: 930daf704e90
+Revises: bb49a0fae0fc
+Create Date: 2026-10-19 18:20:00.000000
+
+"""
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '930daf704e90'
+down_revision: Union[str, None] = 'bb49a0fae0fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# значения на момент создания ревизии: миграция не должна зависеть от последующих изменений приложения
+PARTITION_DAYS_AHEAD = 16
+MAX_LIFETIME_DAYS = 14
+
+# срок жизни хранится в базе данных по имени элемента перечисления
+EXPIRES_AT_SQL = """created_at + CASE lifetime
+    WHEN 'five_min' THEN interval '5 minutes'
+    WHEN 'one_hour' THEN interval '1 hour'
+    WHEN 'twelve_hours' THEN interval '12 hours'
+    WHEN 'one_day' THEN interval '1 day'
+    WHEN 'seven_days' THEN interval '7 days'
+    WHEN 'fourteen_days' THEN interval '14 days'
+END"""
+
+
+def create_partition_sql(day: date) -> str:
+    return (f"CREATE TABLE IF NOT EXISTS secrets_p{day:%Y%m%d} PARTITION OF secrets "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')")
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE secrets RENAME TO secrets_unpartitioned')
+    op.execute('ALTER INDEX ix_secrets_id RENAME TO ix_secrets_unpartitioned_id')
+    op.execute("""
+        CREATE TABLE secrets (
+            id INTEGER NOT NULL DEFAULT nextval('secrets_id_seq'),
+            secret_content BYTEA NOT NULL,
+            passphrase BYTEA NOT NULL,
+            lifetime lifetime NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            user_id INTEGER REFERENCES users (id),
+            PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.create_index(op.f('ix_secrets_id'), 'secrets', ['id'], unique=False)
+    op.create_index(op.f('ix_secrets_expires_at'), 'secrets', ['expires_at'], unique=False)
+    op.execute('CREATE TABLE secrets_default PARTITION OF secrets DEFAULT')
+
+    # партиции покрывают уже существующие секреты и ближайшие дни
+    today = datetime.utcnow().date()
+    for offset in range(-MAX_LIFETIME_DAYS, PARTITION_DAYS_AHEAD + 1):
+        op.execute(create_partition_sql(today + timedelta(days=offset)))
+
+    op.execute(f"""
+        INSERT INTO secrets (id, secret_content, passphrase, lifetime, created_at, expires_at, user_id)
+        SELECT id, secret_content, passphrase, lifetime, created_at, {EXPIRES_AT_SQL}, user_id
+        FROM secrets_unpartitioned
+    """)
+    op.execute('ALTER SEQUENCE secrets_id_seq OWNED BY secrets.id')
+    op.execute('DROP TABLE secrets_unpartitioned')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE secrets RENAME TO secrets_partitioned')
+    op.execute('ALTER INDEX ix_secrets_id RENAME TO ix_secrets_partitioned_id')
+    op.execute('ALTER INDEX ix_secrets_expires_at RENAME TO ix_secrets_partitioned_expires_at')
+    op.execute("""
+        CREATE TABLE secrets (
+            id INTEGER NOT NULL DEFAULT nextval('secrets_id_seq'),
+            secret_content BYTEA NOT NULL,
+            passphrase BYTEA NOT NULL,
+            lifetime lifetime NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            user_id INTEGER REFERENCES users (id),
+            PRIMARY KEY (id)
+        )
+    """)
+    op.create_index(op.f('ix_secrets_id'), 'secrets', ['id'], unique=False)
+    op.execute("""
+        INSERT INTO secrets (id, secret_content, passphrase, lifetime, created_at, user_id)
+        SELECT id, secret_content, passphrase, lifetime, created_at, user_id
+        FROM secrets_partitioned
+    """)
+    op.execute('ALTER SEQUENCE secrets_id_seq OWNED BY secrets.id')
+    op.execute('DROP TABLE secrets_partitioned')
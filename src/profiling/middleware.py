@@ -0,0 +1,49 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth.service import is_admin_token
+from src.profiling.service import PROFILE_MODES, RequestProfiler, profile_output_path
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware, профилирующее отдельный запрос по заголовку X-Profile (cprofile или pyinstrument).
+    Запрос должен содержать административный токен в заголовке X-Admin-Token.
+    Путь к файлу с результатом возвращается в заголовке X-Profile-Output.
+
+    Профилировщик работает в потоке цикла событий, поэтому одновременно профилируется только один запрос,
+    а в результат попадают и конкурентные корутины этого воркера.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        mode = headers.get('x-profile', '').lower()
+        if mode in ('1', 'true'):
+            mode = 'cprofile'
+        if mode not in PROFILE_MODES or self._busy or not is_admin_token(headers.get('x-admin-token')):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler(mode)
+        output_path = profile_output_path(scope['method'], scope['path'], profiler.extension)
+
+        async def send_with_profile_header(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('X-Profile-Output', output_path)
+            await send(message)
+
+        self._busy = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_header)
+        finally:
+            profiler.stop(output_path)
+            self._busy = False
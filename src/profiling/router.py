@@ -0,0 +1,26 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from src.auth.service import verify_admin_token
+from src.config import PROFILING_MAX_SAMPLE_SECONDS
+from src.profiling.service import sample_stacks
+
+router = APIRouter()
+
+
+@router.get('/profile/sample', response_class=PlainTextResponse, dependencies=[Depends(verify_admin_token)],
+            summary='Samples the worker stacks for a given number of seconds.',
+            description='This endpoint periodically captures the stacks of all threads of the worker that serves '
+                        'the request and returns them in the collapsed-stack format accepted by flamegraph.pl and '
+                        'speedscope. Requires the X-Admin-Token header.')
+async def sample_profile(seconds: float = Query(5, gt=0, le=PROFILING_MAX_SAMPLE_SECONDS),
+                         interval_ms: float = Query(5, ge=1, le=1000)):
+    """
+    :param seconds: Sampling duration in seconds.
+    :param interval_ms: Interval between two stack samples in milliseconds.
+    :return: Collapsed stacks with sample counts, one stack per line.
+    """
+    collapsed = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    return PlainTextResponse(collapsed, headers={'Content-Disposition': 'attachment; filename="profile.collapsed"'})
@@ -0,0 +1,113 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # pragma: no cover - pyinstrument не является обязательной зависимостью
+    PyinstrumentProfiler = None
+
+from src.config import PROFILING_OUTPUT_DIR
+
+PROFILE_MODES = ('cprofile', 'pyinstrument')
+
+
+def profile_output_path(method: str, path: str, extension: str) -> str:
+    """
+    Формирует путь к файлу с результатом профилирования запроса.
+
+    :param method: HTTP-метод запроса (тип str)
+    :param path: путь запроса (тип str)
+    :param extension: расширение файла (тип str)
+    :return: путь к файлу (тип str)
+    """
+    os.makedirs(PROFILING_OUTPUT_DIR, exist_ok=True)
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    slug = path.strip('/').replace('/', '_') or 'root'
+    return os.path.join(PROFILING_OUTPUT_DIR, f'{timestamp}-{method.lower()}-{slug}.{extension}')
+
+
+class RequestProfiler:
+    """
+    Профилировщик одного запроса: cProfile или, если установлен, pyinstrument.
+    """
+
+    def __init__(self, mode: str):
+        if mode == 'pyinstrument' and PyinstrumentProfiler is not None:
+            self.mode = 'pyinstrument'
+            self._profiler: Any = PyinstrumentProfiler(async_mode='enabled')
+        else:
+            self.mode = 'cprofile'
+            self._profiler = cProfile.Profile()
+
+    @property
+    def extension(self) -> str:
+        """
+        Расширение файла с результатом профилирования.
+        """
+        return 'html' if self.mode == 'pyinstrument' else 'prof'
+
+    def start(self) -> None:
+        """
+        Запускает профилирование.
+        """
+        if self.mode == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, output_path: str) -> None:
+        """
+        Останавливает профилирование и записывает результат в файл.
+
+        :param output_path: путь к файлу с результатом (тип str)
+        """
+        if self.mode == 'pyinstrument':
+            self._profiler.stop()
+            with open(output_path, 'w') as output:
+                output.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            self._profiler.dump_stats(output_path)
+
+
+def _collapse_frame(frame: Any) -> str:
+    """
+    Сворачивает стек вызовов в строку вида root;...;leaf.
+
+    :param frame: верхний кадр стека потока
+    :return: свернутый стек (тип str)
+    """
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Периодически снимает стеки всех потоков процесса и возвращает их в формате collapsed stacks,
+    который принимают flamegraph.pl и speedscope.
+
+    :param seconds: длительность сэмплирования в секундах (тип float)
+    :param interval: интервал между снимками в секундах (тип float)
+    :return: свернутые стеки с количеством сэмплов, по одному на строку (тип str)
+    """
+    own_ident = threading.get_ident()
+    samples: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            samples[f'{thread_names.get(ident, ident)};{_collapse_frame(frame)}'] += 1
+        time.sleep(interval)
+    return ''.join(f'{stack} {count}\n' for stack, count in samples.most_common())
@@ -0,0 +1,179 @@
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Protocol
+
+from fastapi import HTTPException, Request
+
+from src.config import RATE_LIMIT_STORAGE, RATE_LIMIT_REDIS_URL, RATE_LIMIT_MEMORY_MAX_KEYS
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    Ограничение частоты запросов: не больше limit запросов за period секунд.
+    """
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: Optional[str]) -> Optional['Rate']:
+        """
+        Разбирает ограничение вида '5/minute'.
+
+        :param value: строка ограничения (тип str или None)
+        :return: ограничение или None, если строка пустая (тип Rate или None)
+        """
+        if not value:
+            return None
+        limit, period = value.split('/')
+        return cls(limit=int(limit), period=PERIODS[period.strip()])
+
+
+class RateLimitStorage(Protocol):
+    """
+    Хранилище счетчиков ограничения частоты запросов.
+    """
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        """
+        Учитывает запрос.
+
+        :param key: ключ ограничения (тип str)
+        :param rate: ограничение (тип Rate)
+        :return: 0, если запрос разрешен, иначе количество секунд до следующей попытки (тип float)
+        """
+
+    async def clear(self) -> None:
+        """
+        Сбрасывает все счетчики.
+        """
+
+
+class MemoryTokenBucketStorage:
+    """
+    Хранилище в памяти процесса на основе алгоритма token bucket.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        now = time.monotonic()
+        refill_rate = rate.limit / rate.period
+        tokens, updated_at = self._buckets.get(key, (rate.limit, now))
+        tokens = min(rate.limit, tokens + (now - updated_at) * refill_rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / refill_rate
+        if key not in self._buckets and len(self._buckets) >= self.max_keys:
+            self._prune()
+        self._buckets[key] = (tokens - 1, now)
+        return 0
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+    def _prune(self) -> None:
+        """
+        Удаляет самые давно обновленные корзины, чтобы освободить место под новые ключи.
+        """
+        oldest = sorted(self._buckets, key=lambda bucket_key: self._buckets[bucket_key][1])
+        for key in oldest[:self.max_keys // 10 + 1]:
+            del self._buckets[key]
+
+
+class RedisSlidingWindowStorage:
+    """
+    Хранилище в Redis на основе скользящего окна, общее для всех воркеров и реплик.
+    """
+
+    # окно хранится в отсортированном множестве: элементы - отметки времени запросов
+    SCRIPT = """
+    local key = KEYS[1]
+    local now = tonumber(ARGV[1])
+    local period = tonumber(ARGV[2])
+    local limit = tonumber(ARGV[3])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - period)
+    if redis.call('ZCARD', key) < limit then
+        redis.call('ZADD', key, now, ARGV[4])
+        redis.call('PEXPIRE', key, math.ceil(period * 1000))
+        return '0'
+    end
+    local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+    return tostring(tonumber(oldest[2]) + period - now)
+    """
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+        self._script = self.redis.register_script(self.SCRIPT)
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        now = time.time()
+        retry_after = await self._script(keys=[f'rate_limit:{key}'],
+                                         args=[now, rate.period, rate.limit, uuid.uuid4().hex])
+        return float(retry_after)
+
+    async def clear(self) -> None:
+        async for key in self.redis.scan_iter('rate_limit:*'):
+            await self.redis.delete(key)
+
+
+@lru_cache
+def get_rate_limit_storage() -> RateLimitStorage:
+    """
+    Создает и возвращает хранилище счетчиков, выбранное в настройках RATE_LIMIT_STORAGE.
+
+    :return: хранилище счетчиков (тип RateLimitStorage)
+    """
+    if RATE_LIMIT_STORAGE == 'redis':
+        return RedisSlidingWindowStorage(RATE_LIMIT_REDIS_URL)
+    return MemoryTokenBucketStorage()
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов для маршрута.
+
+    Экземпляр используется как зависимость маршрута для ограничения по IP-адресу клиента,
+    а метод check_account вызывается в обработчике для ограничения по учетной записи.
+    Обе проверки выполняются до дорогих операций вроде хеширования пароля bcrypt.
+    """
+
+    def __init__(self, scope: str, per_ip: Optional[str] = None, per_account: Optional[str] = None):
+        self.scope = scope
+        self.per_ip = Rate.parse(per_ip)
+        self.per_account = Rate.parse(per_account)
+
+    async def __call__(self, request: Request) -> None:
+        if self.per_ip is not None and request.client is not None:
+            await self._hit(f'{self.scope}:ip:{request.client.host}', self.per_ip)
+
+    async def check_account(self, account: str) -> None:
+        """
+        Учитывает запрос к учетной записи.
+
+        :param account: идентификатор учетной записи, например email (тип str)
+        :raises HTTPException: если ограничение превышено, будет вызвана ошибка 429
+        """
+        if self.per_account is not None:
+            await self._hit(f'{self.scope}:account:{account.lower()}', self.per_account)
+
+    async def _hit(self, key: str, rate: Rate) -> None:
+        """
+        Учитывает запрос в хранилище и отклоняет его, если ограничение превышено.
+
+        :param key: ключ ограничения (тип str)
+        :param rate: ограничение (тип Rate)
+        :raises HTTPException: если ограничение превышено, будет вызвана ошибка 429
+        """
+        retry_after = await get_rate_limit_storage().hit(key, rate)
+        if retry_after > 0:
+            raise HTTPException(status_code=429, detail='Слишком много запросов',
+                                headers={'Retry-After': str(max(1, round(retry_after)))})
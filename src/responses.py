@@ -0,0 +1,89 @@
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson не является обязательной зависимостью
+    orjson = None
+
+# ответ по умолчанию сериализуется orjson, если он установлен
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+# ответ с ETag можно хранить только в кеше клиента и перед использованием нужно проверить на сервере
+ETAG_CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Создает ETag из версии ресурса.
+
+    :param parts: значения, от которых зависит представление ресурса
+    :return: значение заголовка ETag (тип str)
+    """
+    digest = hashlib.blake2b(':'.join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет, совпадает ли ETag с одним из значений заголовка If-None-Match.
+    Значения сравниваются без учета признака слабого ETag, как требует RFC 9110 для If-None-Match.
+
+    :param request: HTTP-запрос (тип Request)
+    :param etag: текущий ETag ресурса (тип str)
+    :return: True, если у клиента актуальная версия ресурса (тип bool)
+    """
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Создает ответ 304 без тела.
+
+    :param etag: текущий ETag ресурса (тип str)
+    :return: ответ 304 (тип Response)
+    """
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': ETAG_CACHE_CONTROL})
+
+
+class ModelSerializer:
+    """
+    Заранее построенный сериализатор схемы ответа.
+
+    Возвращает готовый Response, поэтому FastAPI не валидирует результат повторно по response_model
+    и не прогоняет его через jsonable_encoder и json.dumps: валидация ORM-объекта и запись JSON
+    выполняются одним проходом в pydantic-core.
+    """
+
+    def __init__(self, schema: Any):
+        self.adapter = TypeAdapter(schema)
+
+    def dump_json(self, obj: Any) -> bytes:
+        """
+        Сериализует ORM-объект или экземпляр схемы в JSON.
+
+        :param obj: ORM-объект или экземпляр схемы
+        :return: JSON (тип bytes)
+        """
+        return self.adapter.dump_json(self.adapter.validate_python(obj, from_attributes=True))
+
+    def response(self, obj: Any, status_code: int = 200, etag: Optional[str] = None) -> Response:
+        """
+        Создает ответ с сериализованным объектом.
+
+        :param obj: ORM-объект или экземпляр схемы
+        :param status_code: код ответа (тип int)
+        :param etag: ETag ресурса, None - ответ без ETag (тип str или None)
+        :return: ответ с JSON (тип Response)
+        """
+        headers = {'ETag': etag, 'Cache-Control': ETAG_CACHE_CONTROL} if etag is not None else None
+        return Response(content=self.dump_json(obj), status_code=status_code, headers=headers,
+                        media_type='application/json')
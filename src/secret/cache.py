@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from src.config import NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_MAXSIZE
+
+
+class NegativeCache:
+    """
+    Ограниченное по размеру множество ключей с временем жизни.
+
+    Все записи живут одинаковое время, поэтому порядок вставки совпадает с порядком истечения срока:
+    устаревшие и лишние записи вытесняются с начала словаря за O(1).
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, float] = OrderedDict()
+
+    def add(self, key: Hashable) -> None:
+        """
+        Добавляет ключ в множество или продлевает время его жизни.
+
+        :param key: ключ
+        """
+        now = time.monotonic()
+        self._entries[key] = now + self.ttl
+        self._entries.move_to_end(key)
+        self._evict(now)
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Удаляет ключ из множества, если он там есть.
+
+        :param key: ключ
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Очищает множество.
+        """
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        """
+        Вытесняет записи с истекшим сроком и записи сверх максимального размера.
+
+        :param now: текущее монотонное время (тип float)
+        """
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.maxsize:
+                break
+            del self._entries[key]
+
+
+# недавно прочитанные, удаленные по сроку жизни и ненайденные ключи секретов в виде (user_id, ключ)
+negative_cache = NegativeCache(ttl=NEGATIVE_CACHE_TTL, maxsize=NEGATIVE_CACHE_MAXSIZE)
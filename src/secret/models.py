@@ -1,6 +1,7 @@
+from datetime import timedelta
 from enum import Enum
 
-from sqlalchemy import Column, Integer, Enum as EnumType, ForeignKey, LargeBinary, DateTime
+from sqlalchemy import Column, Integer, BigInteger, Enum as EnumType, ForeignKey, LargeBinary, DateTime
 from sqlalchemy.orm import relationship
 
 from src.database import Base
@@ -20,6 +21,17 @@ class Lifetime(str, Enum):
     fourteen_days = '14 дней'
 
 
+# продолжительность каждого срока жизни секрета
+LIFETIME_DURATIONS = {
+    Lifetime.five_min: timedelta(minutes=5),
+    Lifetime.one_hour: timedelta(hours=1),
+    Lifetime.twelve_hours: timedelta(hours=12),
+    Lifetime.one_day: timedelta(days=1),
+    Lifetime.seven_days: timedelta(days=7),
+    Lifetime.fourteen_days: timedelta(days=14),
+}
+
+
 class Secret(Base):
     """
     Модель для описания секретов.
@@ -30,6 +42,19 @@ class Secret(Base):
     passphrase = Column(LargeBinary, nullable=False)
     lifetime = Column(EnumType(Lifetime), nullable=False)
     created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
 
     user_id = Column(Integer, ForeignKey('users.id'))
     user = relationship('User', back_populates='secrets')
+
+
+class UserSecretUsage(Base):
+    """
+    Модель для описания счетчиков секретов пользователя.
+    Счетчики изменяются в одной транзакции с созданием и удалением секретов,
+    поэтому проверка квоты не считает строки таблицы секретов.
+    """
+    __tablename__ = 'secret_usage'
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    secret_count = Column(Integer, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,187 @@
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import DateTime, LargeBinary, column, func, insert, literal, select, table, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.audit.models import AuditEvent, AuditEventType
+from src.audit.service import audit_row, insert_audit_rows
+from src.config import AUDIT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'secrets_p'
+# уменьшение счетчиков пользователей на количество и размер секретов партиции перед ее удалением
+RELEASE_PARTITION_USAGE_SQL = (
+    'UPDATE secret_usage '
+    'SET secret_count = greatest(secret_count - released.count, 0), '
+    'total_bytes = greatest(total_bytes - released.bytes, 0) '
+    'FROM (SELECT user_id, count(*) AS count, sum(length(secret_content)) AS bytes '
+    '      FROM {partition} WHERE user_id IS NOT NULL GROUP BY user_id) AS released '
+    'WHERE secret_usage.user_id = released.user_id'
+)
+# партиция для секретов, для дня истечения которых партиция не была создана заранее
+DEFAULT_PARTITION = 'secrets_default'
+
+
+def partition_name(day: date) -> str:
+    """
+    Возвращает имя партиции таблицы секретов для дня истечения срока жизни.
+
+    :param day: день истечения срока жизни (тип date)
+    :return: имя партиции (тип str)
+    """
+    return f'{PARTITION_PREFIX}{day:%Y%m%d}'
+
+
+def partition_bounds_sql(day: date) -> str:
+    """
+    Возвращает границы партиции для секретов, срок жизни которых истекает в указанный день.
+
+    :param day: день истечения срока жизни (тип date)
+    :return: фрагмент SQL-запроса (тип str)
+    """
+    return f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+
+
+def create_partition_sql(day: date) -> str:
+    """
+    Возвращает DDL партиции для секретов, срок жизни которых истекает в указанный день.
+
+    :param day: день истечения срока жизни (тип date)
+    :return: SQL-запрос (тип str)
+    """
+    return f'CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF secrets {partition_bounds_sql(day)}'
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    """
+    Проверяет, секционирована ли таблица секретов.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :return: True, если таблица секционирована по дню истечения срока жизни, иначе False
+    """
+    query = await db.execute(text("SELECT relkind::text FROM pg_class WHERE relname = 'secrets'"))
+    return query.scalar() == 'p'
+
+
+async def create_partition(db: AsyncSession, day: date) -> None:
+    """
+    Создает партицию для дня истечения срока жизни, если ее еще нет.
+    Если обслуживание партиций долго не запускалось, секреты этого дня уже лежат в партиции по умолчанию,
+    и PostgreSQL не даст создать партицию поверх них. Тогда партиция создается отдельной таблицей,
+    секреты дня переносятся в нее из партиции по умолчанию, и таблица присоединяется к секретам.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param day: день истечения срока жизни (тип date)
+    """
+    name = partition_name(day)
+    if await db.scalar(text(f"SELECT to_regclass('{name}') IS NOT NULL")):
+        return
+    bounds = {'lower': datetime.combine(day, time()), 'upper': datetime.combine(day + timedelta(days=1), time())}
+    in_default = await db.scalar(text(
+        f"SELECT to_regclass('{DEFAULT_PARTITION}') IS NOT NULL AND EXISTS "
+        f"(SELECT 1 FROM {DEFAULT_PARTITION} WHERE expires_at >= :lower AND expires_at < :upper)"
+    ), bounds)
+    if not in_default:
+        await db.execute(text(create_partition_sql(day)))
+        return
+    await db.execute(text(f'CREATE TABLE {name} (LIKE secrets INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    await db.execute(text(
+        f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE expires_at >= :lower AND expires_at < :upper '
+        f'RETURNING *) INSERT INTO {name} SELECT * FROM moved'
+    ), bounds)
+    await db.execute(text(f'ALTER TABLE secrets ATTACH PARTITION {name} {partition_bounds_sql(day)}'))
+
+
+async def create_future_partitions(db: AsyncSession, today: date, days_ahead: int) -> list[str]:
+    """
+    Заранее создает партиции на ближайшие дни, чтобы новые секреты не попадали в партицию по умолчанию.
+    Каждая партиция создается в своей точке сохранения: ошибка создания одной партиции записывается в лог
+    и не откатывает остальное обслуживание партиций.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param today: текущий день (тип date)
+    :param days_ahead: количество дней вперед (тип int)
+    :return: имена созданных или уже существовавших партиций (тип list[str])
+    """
+    names = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        try:
+            async with db.begin_nested():
+                await create_partition(db, day)
+        except SQLAlchemyError:
+            logger.exception('Не удалось создать партицию секретов %s', partition_name(day))
+            continue
+        names.append(partition_name(day))
+    return names
+
+
+async def audit_partition_expiry(db: AsyncSession, name: str, now: datetime, audit_db: AsyncSession) -> None:
+    """
+    Записывает в журнал аудита события истечения всех секретов партиции без фиксации транзакции.
+    Если журнал аудита находится в той же базе данных, записи создаются одним INSERT ... SELECT на сервере,
+    и ключи секретов не передаются в процесс. Иначе (партиция в шарде) ключи читаются серверным курсором
+    и записываются в журнал пачками по AUDIT_BATCH_SIZE.
+
+    :param db: экземпляр сессии базы данных с партицией (тип AsyncSession)
+    :param name: имя партиции (тип str)
+    :param now: время события UTC (тип datetime)
+    :param audit_db: экземпляр сессии базы данных с журналом аудита (тип AsyncSession)
+    """
+    partition = table(name, column('user_id'), column('passphrase', LargeBinary))
+    if audit_db is db:
+        events = AuditEvent.__table__
+        await db.execute(insert(events).from_select(
+            ['event', 'user_id', 'secret_ref', 'created_at'],
+            select(literal(AuditEventType.secret_expire, events.c.event.type), partition.c.user_id,
+                   func.encode(func.sha256(partition.c.passphrase), 'hex'), literal(now, DateTime))
+        ))
+        return
+    # курсор закрывается явно: PostgreSQL не дает удалить партицию, пока по ней открыт курсор
+    await db.execute(text(f'DECLARE expired_keys NO SCROLL CURSOR FOR SELECT user_id, passphrase FROM {name}'))
+    while True:
+        batch = (await db.execute(text(f'FETCH {AUDIT_BATCH_SIZE} FROM expired_keys'))).all()
+        if not batch:
+            break
+        await insert_audit_rows(audit_db, [audit_row(AuditEventType.secret_expire, user_id, passphrase, now)
+                                           for user_id, passphrase in batch])
+    await db.execute(text('CLOSE expired_keys'))
+
+
+async def drop_expired_partitions(db: AsyncSession, now: datetime,
+                                  audit_db: Optional[AsyncSession] = None) -> list[str]:
+    """
+    Удаляет партиции, срок жизни всех секретов в которых истек.
+    Истекшие секреты не удаляются построчно, поэтому не оставляют мертвых строк для autovacuum:
+    место освобождается удалением партиции целиком. Перед удалением секреты партиции записываются
+    в журнал аудита, а счетчики secret_usage уменьшаются в той же транзакции, как при удалении секрета.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param now: текущее время UTC (тип datetime)
+    :param audit_db: экземпляр сессии базы данных с журналом аудита (тип AsyncSession или None, если аудит
+        не ведется)
+    :return: имена удаленных партиций (тип list[str])
+    """
+    query = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'secrets'"
+    ))
+    dropped = []
+    for name in sorted(query.scalars().all()):
+        suffix = name[len(PARTITION_PREFIX):]
+        if not name.startswith(PARTITION_PREFIX) or not suffix.isdigit():
+            continue
+        upper_bound = datetime.combine(datetime.strptime(suffix, '%Y%m%d').date() + timedelta(days=1), time())
+        if upper_bound <= now:
+            if audit_db is not None:
+                await audit_partition_expiry(db, name, now, audit_db)
+            await db.execute(text(RELEASE_PARTITION_USAGE_SQL.format(partition=name)))
+            await db.execute(text(f'DROP TABLE {name}'))
+            dropped.append(name)
+    return dropped
@@ -1,28 +1,69 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.service import get_current_user
-from src.database import get_db
+from src.database import get_db, get_shard_dbs
+from src.idempotency import IdempotencyCache, request_fingerprint
+from src.responses import ModelSerializer
 from src.secret.schemas import SecretKeyOut, SecretCreate, SecretDecryptOut
 from src.secret import service
+from src.secret.storage import SecretStorage, create_secret_storage
 from src.user.models import User
 
 router = APIRouter()
 
+secret_key_serializer = ModelSerializer(SecretKeyOut)
+secret_decrypt_serializer = ModelSerializer(SecretDecryptOut)
+generate_idempotency = IdempotencyCache()
+
+
+async def get_secret_storage(db: AsyncSession = Depends(get_db),
+                             shard_dbs: list[AsyncSession] = Depends(get_shard_dbs)) -> SecretStorage:
+    """
+    Зависимость, возвращающая хранилище секретов для запроса.
+    Находится в роутере, чтобы модуль хранилища, который использует воркер Celery, не импортировал FastAPI.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param shard_dbs: экземпляры сессий шардов секретов (тип list[AsyncSession])
+    :return: хранилище секретов (тип SecretStorage)
+    """
+    return create_secret_storage(db, shard_dbs)
+
 
 @router.post('/generate/', response_model=SecretKeyOut, status_code=201, summary='Generates a new secret key.',
              description='This endpoint allows the authenticated user to create a new secret key based '
                          'on the provided secret information. '
-                         'It returns the generated secret key information upon successful creation.')
-async def generate_secret(secret: SecretCreate, db: AsyncSession = Depends(get_db),
-                          current_user: User = Depends(get_current_user)):
+                         'It returns the generated secret key information upon successful creation. '
+                         'A request retried with the same Idempotency-Key header returns the original response '
+                         'without creating another secret.')
+async def generate_secret(secret: SecretCreate, storage: SecretStorage = Depends(get_secret_storage),
+                          current_user: User = Depends(get_current_user),
+                          idempotency_key: Optional[str] = Header(None, max_length=255)):
     """
     :param secret: The data containing the details for the new secret key.
-    :param db: The database session dependency for performing the secret generation.
+    :param storage: The secret storage dependency for performing the secret generation.
     :param current_user: The currently authenticated user, used for associating the secret.
+    :param idempotency_key: The optional Idempotency-Key header identifying retries of the same request.
     :return: The generated secret key information as an instance of SecretKeyOut.
+    :raises HTTPException: If the user's secret quota would be exceeded, a 403 error will be raised.
+    :raises HTTPException: If the Idempotency-Key was used for a different request, a 422 error will be raised,
+    and if a request with the same key is still running in another worker, a 409 error will be raised.
     """
-    return await service.generate_secret(secret, current_user.id, db)
+    if idempotency_key is None:
+        secret_key = await service.generate_secret(secret, current_user.id, storage)
+        return secret_key_serializer.response(secret_key, status_code=201)
+
+    async def produce() -> bytes:
+        return secret_key_serializer.dump_json(await service.generate_secret(secret, current_user.id, storage))
+
+    content, replayed = await generate_idempotency.run(f'{current_user.id}:{idempotency_key}',
+                                                       request_fingerprint(secret.model_dump_json().encode()),
+                                                       produce)
+    return Response(content=content, status_code=201, media_type='application/json',
+                    headers={'Idempotent-Replayed': 'true' if replayed else 'false'})
 
 
 @router.get('/secrets/{secret_key}', response_model=SecretDecryptOut,
@@ -30,12 +71,12 @@ async def generate_secret(secret: SecretCreate, db: AsyncSession = Depends(get_d
             description='This endpoint allows the authenticated user to access and decrypt a secret associated '
                         'with the provided secret key. '
                         'It returns the decrypted secret information upon successful retrieval.')
-async def get_secret(secret_key: bytes, db: AsyncSession = Depends(get_db),
+async def get_secret(secret_key: bytes, storage: SecretStorage = Depends(get_secret_storage),
                      current_user: User = Depends(get_current_user)):
     """
     :param secret_key: The secret key to be retrieved and decrypted.
-    :param db: The database session dependency for accessing secret data.
+    :param storage: The secret storage dependency for accessing secret data.
     :param current_user: The currently authenticated user, used for permission checks.
     :return: The decrypted secret information as an instance of SecretDecryptOut.
     """
-    return await service.get_secret(secret_key, current_user.id, db)
+    return secret_decrypt_serializer.response(await service.get_secret(secret_key, current_user.id, storage))
@@ -1,7 +1,8 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from src.config import SECRET_QUOTA_MAX_SECRET_SIZE
 from src.secret.models import Lifetime
 
 
@@ -17,8 +18,9 @@ class SecretBase(BaseModel):
 class SecretCreate(SecretBase):
     """
     Модель для создания секрета.
+    Размер содержимого проверяется при разборе запроса, поэтому слишком большой секрет не шифруется.
     """
-    pass
+    secret_content: bytes = Field(max_length=SECRET_QUOTA_MAX_SECRET_SIZE or None)
 
 
 class SecretOut(SecretBase):
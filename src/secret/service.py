@@ -2,52 +2,77 @@ from datetime import datetime
 
 from cryptography.fernet import Fernet
 from fastapi import HTTPException
-from sqlalchemy.future import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.secret.models import Secret
+from src.audit.models import AuditEventType
+from src.audit.service import audit_log
+from src.config import SECRET_QUOTA_MAX_COUNT, SECRET_QUOTA_MAX_BYTES
+from src.secret.cache import negative_cache
 from src.secret.schemas import SecretCreate, SecretKeyOut, SecretDecryptOut
+from src.secret.storage import SecretStorage, StoredSecret
 
 # генерация ключа
 key = Fernet.generate_key()
 cipher_suite = Fernet(key)
 
 
-async def generate_secret(secret: SecretCreate, user_id: int, db: AsyncSession) -> SecretKeyOut:
+async def generate_secret(secret: SecretCreate, user_id: int, storage: SecretStorage) -> SecretKeyOut:
     """
-    Генерирует новый секрет и сохраняет его в базе данных.
+    Генерирует новый секрет и сохраняет его в хранилище секретов.
 
     :param secret: объект с данными о новом секрете (тип SecretCreate)
     :param user_id: идентификатор пользователя (тип int)
-    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param storage: хранилище секретов (тип SecretStorage)
     :return: ключ секрета (тип SecretKeyOut)
+    :raises HTTPException: если создание секрета превысит квоту пользователя, будет вызвана ошибка 403
     """
     secret_content = cipher_suite.encrypt(secret.secret_content)
     passphrase = cipher_suite.encrypt(secret.passphrase)
-    created_at = datetime.utcnow()
-    db_secret = Secret(secret_content=secret_content, lifetime=secret.lifetime, passphrase=passphrase, user_id=user_id,
-                       created_at=created_at)
-    db.add(db_secret)
-    await db.commit()
+    await check_quota(user_id, len(secret_content), storage)
+    await storage.put(StoredSecret(user_id=user_id, passphrase=passphrase, secret_content=secret_content,
+                                   lifetime=secret.lifetime, created_at=datetime.utcnow()))
+    audit_log.record(AuditEventType.secret_create, user_id, passphrase)
     return SecretKeyOut(passphrase=passphrase)
 
 
-async def get_secret(secret_key: bytes, user_id: int, db: AsyncSession) -> SecretDecryptOut:
+async def check_quota(user_id: int, size: int, storage: SecretStorage) -> None:
     """
-    Получает секрет по зашифрованному ключу и удаляет его из базы данных.
+    Проверяет, что новый секрет не превысит квоту пользователя по количеству секретов и их суммарному размеру.
+    Счетчики хранилища поддерживаются при каждом изменении, поэтому проверка не считает секреты.
+    Одновременные запросы могут превысить квоту на несколько секретов.
+
+    :param user_id: идентификатор пользователя (тип int)
+    :param size: размер зашифрованного секрета в байтах (тип int)
+    :param storage: хранилище секретов (тип SecretStorage)
+    :raises HTTPException: если квота будет превышена, будет вызвана ошибка 403
+    """
+    if not SECRET_QUOTA_MAX_COUNT and not SECRET_QUOTA_MAX_BYTES:
+        return
+    usage = await storage.usage(user_id)
+    if SECRET_QUOTA_MAX_COUNT and usage.count + 1 > SECRET_QUOTA_MAX_COUNT:
+        raise HTTPException(status_code=403, detail='Превышено количество секретов пользователя')
+    if SECRET_QUOTA_MAX_BYTES and usage.total_bytes + size > SECRET_QUOTA_MAX_BYTES:
+        raise HTTPException(status_code=403, detail='Превышен суммарный размер секретов пользователя')
+
+
+async def get_secret(secret_key: bytes, user_id: int, storage: SecretStorage) -> SecretDecryptOut:
+    """
+    Получает секрет по зашифрованному ключу и удаляет его из хранилища секретов.
 
     :param secret_key: зашифрованный ключ секрета (тип bytes)
     :param user_id: идентификатор пользователя (тип int)
-    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param storage: хранилище секретов (тип SecretStorage)
     :return: расшифрованный секрет (тип SecretDecryptOut)
     """
-    query = await db.execute(select(Secret).where((Secret.passphrase == secret_key) & (Secret.user_id == user_id)))
-    db_secret = query.scalars().first()
-    if db_secret is None:
+    # повторные запросы прочитанных, удаленных и несуществующих ключей не доходят до хранилища
+    cache_key = (user_id, secret_key)
+    if cache_key in negative_cache:
+        raise HTTPException(status_code=404, detail='Секрет не найден')
+
+    encrypted_secret = await storage.take_once(user_id, secret_key)
+    negative_cache.add(cache_key)
+    if encrypted_secret is None:
         raise HTTPException(status_code=404, detail='Секрет не найден')
+    audit_log.record(AuditEventType.secret_read, user_id, secret_key)
 
-    encrypted_secret = db_secret.secret_content
     decrypted_secret = cipher_suite.decrypt(encrypted_secret)
-    await db.delete(db_secret)
-    await db.commit()
     return SecretDecryptOut(secret_content=decrypted_secret)
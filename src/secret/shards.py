@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from sqlalchemy import ForeignKeyConstraint, MetaData
+
+from src.secret.models import Secret, UserSecretUsage
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / 'alembic.ini'
+
+
+def shard_metadata() -> MetaData:
+    """
+    Возвращает описание таблиц шарда секретов для автогенерации миграций шардов.
+    Пользователи хранятся в основной базе данных, поэтому в шарде таблицы создаются без внешних ключей
+    на таблицу пользователей.
+
+    :return: описание таблиц (тип MetaData)
+    """
+    metadata = MetaData()
+    for table in (Secret.__table__, UserSecretUsage.__table__):
+        shard_table = table.to_metadata(metadata)
+        for constraint in [c for c in shard_table.constraints if isinstance(c, ForeignKeyConstraint)]:
+            shard_table.constraints.discard(constraint)
+        shard_table.foreign_keys.clear()
+        for column in shard_table.columns:
+            column.foreign_keys.clear()
+    # без внешнего ключа первичный ключ стал бы автоинкрементным
+    metadata.tables[UserSecretUsage.__tablename__].c.user_id.autoincrement = False
+    return metadata
+
+
+def migrate_shards(revision: str = 'head') -> None:
+    """
+    Применяет миграции схемы шардов из src/shard_migrations ко всем шардам секретов из настройки SECRET_SHARD_URLS.
+    Версия схемы хранится в каждом шарде отдельно, поэтому шард, добавленный позже, догоняет остальные.
+
+    :param revision: ревизия схемы шардов (тип str)
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(ALEMBIC_INI), ini_section='shards'), revision)
+
+
+if __name__ == '__main__':
+    migrate_shards()
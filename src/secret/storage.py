@@ -0,0 +1,568 @@
+import asyncio
+import hashlib
+import heapq
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Protocol
+
+from sqlalchemy import bindparam, column, delete, func, table, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.config import SECRET_STORAGE, SECRET_HOT_TIER_ENABLED, SECRET_HOT_TIER_REDIS_URL, SECRET_HOT_TIER_LIFETIMES
+from src.secret.models import Lifetime, Secret, LIFETIME_DURATIONS, UserSecretUsage
+from src.secret.partitions import DEFAULT_PARTITION, is_partitioned
+
+
+@dataclass
+class StoredSecret:
+    """
+    Зашифрованный секрет в хранилище.
+    """
+    user_id: int
+    passphrase: bytes
+    secret_content: bytes
+    lifetime: Lifetime
+    created_at: datetime
+
+    @property
+    def expires_at(self) -> datetime:
+        """
+        Момент истечения срока жизни секрета.
+        """
+        return self.created_at + LIFETIME_DURATIONS[self.lifetime]
+
+
+@dataclass
+class SecretUsage:
+    """
+    Количество хранимых секретов пользователя и их суммарный размер в байтах.
+    """
+    count: int = 0
+    total_bytes: int = 0
+
+    def __add__(self, other: 'SecretUsage') -> 'SecretUsage':
+        return SecretUsage(self.count + other.count, self.total_bytes + other.total_bytes)
+
+
+class SecretStorage(Protocol):
+    """
+    Хранилище зашифрованных секретов.
+    """
+
+    async def put(self, secret: StoredSecret) -> None:
+        """
+        Сохраняет секрет.
+
+        :param secret: зашифрованный секрет (тип StoredSecret)
+        """
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        """
+        Атомарно получает и удаляет секрет пользователя.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :param passphrase: зашифрованный ключ секрета (тип bytes)
+        :return: зашифрованное содержимое секрета или None, если секрета нет (тип bytes или None)
+        """
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        """
+        Удаляет секреты, срок жизни которых истек.
+
+        :param now: текущее время UTC (тип datetime)
+        :return: удаленные ключи в виде (user_id, ключ) (тип list)
+        """
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        """
+        Возвращает секреты пользователя.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :return: секреты пользователя (тип list[StoredSecret])
+        """
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        """
+        Возвращает счетчики хранимых секретов пользователя за O(1), не перебирая секреты.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :return: счетчики пользователя (тип SecretUsage)
+        """
+
+
+class PostgresSecretStorage:
+    """
+    Хранилище секретов в PostgreSQL в рамках сессии запроса.
+    Счетчики пользователя в таблице secret_usage изменяются в той же транзакции, что и секреты.
+    """
+
+    # уменьшение счетчиков нескольких пользователей одним executemany
+    RELEASE_USAGE = (
+        update(UserSecretUsage.__table__)
+        .where(UserSecretUsage.user_id == bindparam('b_user_id'))
+        .values(secret_count=func.greatest(UserSecretUsage.secret_count - bindparam('b_count'), 0),
+                total_bytes=func.greatest(UserSecretUsage.total_bytes - bindparam('b_bytes'), 0))
+    )
+
+    # партиция по умолчанию секционированной таблицы секретов
+    DEFAULT_PARTITION_TABLE = table(DEFAULT_PARTITION, column('user_id'), column('passphrase'),
+                                    column('secret_content'), column('expires_at'))
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def put(self, secret: StoredSecret) -> None:
+        self.db.add(Secret(secret_content=secret.secret_content, lifetime=secret.lifetime,
+                           passphrase=secret.passphrase, user_id=secret.user_id, created_at=secret.created_at,
+                           expires_at=secret.expires_at))
+        upsert = insert(UserSecretUsage).values(user_id=secret.user_id, secret_count=1,
+                                                total_bytes=len(secret.secret_content))
+        await self.db.execute(upsert.on_conflict_do_update(
+            index_elements=[UserSecretUsage.user_id],
+            set_={'secret_count': UserSecretUsage.secret_count + upsert.excluded.secret_count,
+                  'total_bytes': UserSecretUsage.total_bytes + upsert.excluded.total_bytes},
+        ))
+        await self.db.commit()
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        # чтение и удаление выполняются одним запросом DELETE ... RETURNING,
+        # истекший, но еще не удаленный секрет не возвращается
+        query = await self.db.execute(
+            delete(Secret).where((Secret.passphrase == passphrase) & (Secret.user_id == user_id) &
+                                 (Secret.expires_at > datetime.utcnow()))
+            .returning(Secret.secret_content)
+        )
+        secret_content = query.scalars().first()
+        if secret_content is not None:
+            await self.db.execute(self.RELEASE_USAGE,
+                                  [{'b_user_id': user_id, 'b_count': 1, 'b_bytes': len(secret_content)}])
+        await self.db.commit()
+        return secret_content
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        # в секционированной таблице истекшие секреты удаляются вместе с партициями задачей
+        # maintain_secret_partitions, а take_once их уже не возвращает; построчно удаляются только секреты
+        # из партиции по умолчанию, которая никогда не удаляется
+        secrets = self.DEFAULT_PARTITION_TABLE if await is_partitioned(self.db) else Secret.__table__
+        query = await self.db.execute(
+            delete(secrets).where(secrets.c.expires_at <= now)
+            .returning(secrets.c.user_id, secrets.c.passphrase, func.length(secrets.c.secret_content))
+        )
+        burned_keys = []
+        released: dict[int, SecretUsage] = {}
+        for user_id, passphrase, size in query.all():
+            burned_keys.append((user_id, passphrase))
+            if user_id is not None:
+                released[user_id] = released.get(user_id, SecretUsage()) + SecretUsage(1, size)
+        if released:
+            await self.db.execute(self.RELEASE_USAGE, [
+                {'b_user_id': user_id, 'b_count': usage.count, 'b_bytes': usage.total_bytes}
+                for user_id, usage in released.items()
+            ])
+        await self.db.commit()
+        return burned_keys
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        query = await self.db.execute(select(Secret).where(Secret.user_id == user_id))
+        return [StoredSecret(user_id=secret.user_id, passphrase=secret.passphrase,
+                             secret_content=secret.secret_content, lifetime=secret.lifetime,
+                             created_at=secret.created_at)
+                for secret in query.scalars().all()]
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        query = await self.db.execute(select(UserSecretUsage.secret_count, UserSecretUsage.total_bytes)
+                                      .where(UserSecretUsage.user_id == user_id))
+        row = query.first()
+        return SecretUsage(*row) if row is not None else SecretUsage()
+
+
+class MemorySecretStorage:
+    """
+    Хранилище секретов в памяти процесса для развертывания на одном узле и бенчмарков.
+
+    Секреты хранятся в словаре, а сроки их жизни - в куче, поэтому удаление истекших секретов
+    стоит O(k log n) для k истекших секретов. Истекшие секреты удаляются при каждой записи.
+    """
+
+    def __init__(self):
+        self._secrets: dict[tuple[int, bytes], StoredSecret] = {}
+        self._by_user: dict[int, set[bytes]] = {}
+        self._expiry_heap: list[tuple[datetime, int, bytes]] = []
+        self._usage: dict[int, SecretUsage] = {}
+
+    async def put(self, secret: StoredSecret) -> None:
+        await self.purge_expired(datetime.utcnow())
+        self._pop(secret.user_id, secret.passphrase)
+        self._secrets[(secret.user_id, secret.passphrase)] = secret
+        self._by_user.setdefault(secret.user_id, set()).add(secret.passphrase)
+        self._usage[secret.user_id] = self._usage.get(secret.user_id, SecretUsage()) + \
+            SecretUsage(1, len(secret.secret_content))
+        heapq.heappush(self._expiry_heap, (secret.expires_at, secret.user_id, secret.passphrase))
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        secret = self._pop(user_id, passphrase)
+        if secret is None or secret.expires_at <= datetime.utcnow():
+            return None
+        return secret.secret_content
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        burned_keys = []
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, user_id, passphrase = heapq.heappop(self._expiry_heap)
+            secret = self._secrets.get((user_id, passphrase))
+            # секрет мог быть уже прочитан или записан заново с другим сроком жизни
+            if secret is not None and secret.expires_at == expires_at:
+                self._pop(user_id, passphrase)
+                burned_keys.append((user_id, passphrase))
+        return burned_keys
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        return [self._secrets[(user_id, passphrase)] for passphrase in self._by_user.get(user_id, ())]
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        # истекшие, но еще не удаленные секреты учитываются до следующей записи
+        return self._usage.get(user_id, SecretUsage())
+
+    async def clear(self) -> None:
+        """
+        Удаляет все секреты.
+        """
+        self._secrets.clear()
+        self._by_user.clear()
+        self._expiry_heap.clear()
+        self._usage.clear()
+
+    def _pop(self, user_id: int, passphrase: bytes) -> Optional[StoredSecret]:
+        """
+        Удаляет секрет из словаря и индекса пользователя.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :param passphrase: зашифрованный ключ секрета (тип bytes)
+        :return: удаленный секрет или None (тип StoredSecret или None)
+        """
+        secret = self._secrets.pop((user_id, passphrase), None)
+        if secret is not None:
+            passphrases = self._by_user[user_id]
+            passphrases.discard(passphrase)
+            if not passphrases:
+                del self._by_user[user_id]
+            usage = self._usage[user_id] + SecretUsage(-1, -len(secret.secret_content))
+            if usage.count:
+                self._usage[user_id] = usage
+            else:
+                del self._usage[user_id]
+        return secret
+
+
+class RedisSecretStorage:
+    """
+    Хранилище короткоживущих секретов в Redis.
+
+    Секрет хранится с собственным TTL Redis и читается с одновременным удалением через GETDEL,
+    поэтому такие секреты не создают записей WAL и мертвых строк в PostgreSQL.
+    Истекшие секреты удаляет сам Redis.
+
+    Счетчики пользователя хранятся в хеше secret_usage:{user_id} вместе с размерами секретов,
+    а сроки жизни секретов - в сортированном множестве secret_usage_expiry:{user_id}.
+    Скрипты Lua изменяют секрет и счетчики атомарно и вычитают истекшие секреты из счетчиков.
+
+    Ключи всех секретов со сроками жизни хранятся в сортированном множестве secret_expiry, из которого
+    purge_expired забирает ключи истекших секретов для журнала аудита.
+    """
+
+    EXPIRY_KEY = 'secret_expiry'
+    # количество ключей, которое скрипт удаления истекших секретов забирает за один вызов
+    PURGE_BATCH = 1000
+
+    TRIM = """
+    local function trim(expiry_key, usage_key, now)
+        local expired = redis.call('ZRANGEBYSCORE', expiry_key, '-inf', now)
+        if #expired == 0 then
+            return
+        end
+        local size = 0
+        for _, member in ipairs(expired) do
+            size = size + (tonumber(redis.call('HGET', usage_key, member)) or 0)
+            redis.call('HDEL', usage_key, member)
+        end
+        redis.call('ZREMRANGEBYSCORE', expiry_key, '-inf', now)
+        redis.call('HINCRBY', usage_key, 'count', -#expired)
+        redis.call('HINCRBY', usage_key, 'bytes', -size)
+    end
+    """
+    PUT_SCRIPT = TRIM + """
+    trim(KEYS[2], KEYS[3], ARGV[6])
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    redis.call('ZADD', KEYS[4], ARGV[4], ARGV[7])
+    if redis.call('ZADD', KEYS[2], ARGV[4], ARGV[3]) == 1 then
+        redis.call('HSET', KEYS[3], ARGV[3], ARGV[5])
+        redis.call('HINCRBY', KEYS[3], 'count', 1)
+        redis.call('HINCRBY', KEYS[3], 'bytes', ARGV[5])
+    end
+    local latest = redis.call('ZRANGE', KEYS[2], -1, -1, 'WITHSCORES')[2]
+    redis.call('PEXPIREAT', KEYS[2], latest)
+    redis.call('PEXPIREAT', KEYS[3], latest)
+    """
+    TAKE_SCRIPT = """
+    local value = redis.call('GETDEL', KEYS[1])
+    if value then
+        redis.call('ZREM', KEYS[4], ARGV[2])
+        local size = tonumber(redis.call('HGET', KEYS[3], ARGV[1]))
+        if size then
+            redis.call('HDEL', KEYS[3], ARGV[1])
+            redis.call('ZREM', KEYS[2], ARGV[1])
+            redis.call('HINCRBY', KEYS[3], 'count', -1)
+            redis.call('HINCRBY', KEYS[3], 'bytes', -size)
+        end
+    end
+    return value
+    """
+    USAGE_SCRIPT = TRIM + """
+    trim(KEYS[1], KEYS[2], ARGV[1])
+    return redis.call('HMGET', KEYS[2], 'count', 'bytes')
+    """
+    PURGE_SCRIPT = """
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+    if #expired > 0 then
+        redis.call('ZREM', KEYS[1], unpack(expired))
+    end
+    return expired
+    """
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(url)
+        self._put_script = self.redis.register_script(self.PUT_SCRIPT)
+        self._take_script = self.redis.register_script(self.TAKE_SCRIPT)
+        self._usage_script = self.redis.register_script(self.USAGE_SCRIPT)
+        self._purge_script = self.redis.register_script(self.PURGE_SCRIPT)
+
+    @staticmethod
+    def _member(passphrase: bytes) -> str:
+        """
+        Возвращает хеш ключа секрета, под которым секрет хранится в Redis.
+
+        :param passphrase: зашифрованный ключ секрета (тип bytes)
+        :return: хеш ключа (тип str)
+        """
+        return hashlib.sha256(passphrase).hexdigest()
+
+    @classmethod
+    def _key(cls, user_id: int, passphrase: bytes) -> str:
+        """
+        Формирует ключ Redis для секрета пользователя.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :param passphrase: зашифрованный ключ секрета (тип bytes)
+        :return: ключ Redis (тип str)
+        """
+        return f'secret:{user_id}:{cls._member(passphrase)}'
+
+    @staticmethod
+    def _usage_keys(user_id: int) -> list[str]:
+        """
+        Формирует ключи Redis со сроками жизни и счетчиками секретов пользователя.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :return: ключи Redis (тип list[str])
+        """
+        return [f'secret_usage_expiry:{user_id}', f'secret_usage:{user_id}']
+
+    @staticmethod
+    def _expiry_member(user_id: int, passphrase: bytes) -> bytes:
+        """
+        Формирует элемент множества secret_expiry, из которого восстанавливается ключ секрета.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :param passphrase: зашифрованный ключ секрета (тип bytes)
+        :return: элемент множества (тип bytes)
+        """
+        return str(user_id).encode() + b'|' + passphrase
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    async def put(self, secret: StoredSecret) -> None:
+        # срок жизни, время создания и ключ хранятся в заголовке значения перед зашифрованным содержимым,
+        # токены Fernet не содержат символа '|'
+        value = b'|'.join((secret.lifetime.name.encode(), secret.created_at.isoformat().encode(), secret.passphrase,
+                           secret.secret_content))
+        ttl_ms = int(LIFETIME_DURATIONS[secret.lifetime].total_seconds() * 1000)
+        now_ms = self._now_ms()
+        await self._put_script(
+            keys=[self._key(secret.user_id, secret.passphrase), *self._usage_keys(secret.user_id), self.EXPIRY_KEY],
+            args=[value, ttl_ms, self._member(secret.passphrase), now_ms + ttl_ms, len(secret.secret_content),
+                  now_ms, self._expiry_member(secret.user_id, secret.passphrase)],
+        )
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        value = await self._take_script(
+            keys=[self._key(user_id, passphrase), *self._usage_keys(user_id), self.EXPIRY_KEY],
+            args=[self._member(passphrase), self._expiry_member(user_id, passphrase)],
+        )
+        if value is None:
+            return None
+        return value.split(b'|', 3)[3]
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        # сами секреты и счетчики удаляет Redis по TTL, здесь забираются только ключи истекших секретов
+        now_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        burned_keys = []
+        while True:
+            expired = await self._purge_script(keys=[self.EXPIRY_KEY], args=[now_ms, self.PURGE_BATCH])
+            for member in expired:
+                user_id, passphrase = member.split(b'|', 1)
+                burned_keys.append((int(user_id), passphrase))
+            if len(expired) < self.PURGE_BATCH:
+                return burned_keys
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        secrets = []
+        async for key in self.redis.scan_iter(f'secret:{user_id}:*'):
+            value = await self.redis.get(key)
+            if value is None:
+                continue
+            lifetime, created_at, passphrase, secret_content = value.split(b'|', 3)
+            secrets.append(StoredSecret(user_id=user_id, passphrase=passphrase,
+                                        secret_content=secret_content, lifetime=Lifetime[lifetime.decode()],
+                                        created_at=datetime.fromisoformat(created_at.decode())))
+        return secrets
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        count, total_bytes = await self._usage_script(keys=self._usage_keys(user_id), args=[self._now_ms()])
+        return SecretUsage(int(count or 0), int(total_bytes or 0))
+
+
+class TieredSecretStorage:
+    """
+    Хранилище, которое держит короткоживущие секреты в быстром хранилище, а остальные - в основном.
+    """
+
+    def __init__(self, hot: SecretStorage, cold: SecretStorage, hot_lifetimes: list[str]):
+        self.hot = hot
+        self.cold = cold
+        self.hot_lifetimes = hot_lifetimes
+
+    async def put(self, secret: StoredSecret) -> None:
+        if secret.lifetime.name in self.hot_lifetimes:
+            await self.hot.put(secret)
+        else:
+            await self.cold.put(secret)
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        secret_content = await self.hot.take_once(user_id, passphrase)
+        if secret_content is None:
+            secret_content = await self.cold.take_once(user_id, passphrase)
+        return secret_content
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        return await self.hot.purge_expired(now) + await self.cold.purge_expired(now)
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        return await self.hot.list_by_user(user_id) + await self.cold.list_by_user(user_id)
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        return await self.hot.usage(user_id) + await self.cold.usage(user_id)
+
+
+class ShardedSecretStorage:
+    """
+    Хранилище, которое распределяет секреты по шардам по хешу идентификатора пользователя из ключа поиска секрета.
+
+    Все секреты и счетчики пользователя находятся в одном шарде, поэтому создание секрета вместе с проверкой квоты
+    и чтение секрета обращаются ровно к одному шарду. Удаление истекших секретов выполняется во всех шардах
+    одновременно.
+    """
+
+    def __init__(self, shards: list[SecretStorage]):
+        self.shards = shards
+
+    def shard_for(self, user_id: int) -> SecretStorage:
+        """
+        Возвращает шард секретов пользователя. Хеш не зависит от процесса, поэтому все воркеры выбирают один шард.
+
+        :param user_id: идентификатор пользователя (тип int)
+        :return: шард (тип SecretStorage)
+        """
+        digest = hashlib.sha256(str(user_id).encode()).digest()
+        return self.shards[int.from_bytes(digest[:8], 'big') % len(self.shards)]
+
+    async def put(self, secret: StoredSecret) -> None:
+        await self.shard_for(secret.user_id).put(secret)
+
+    async def take_once(self, user_id: int, passphrase: bytes) -> Optional[bytes]:
+        return await self.shard_for(user_id).take_once(user_id, passphrase)
+
+    async def purge_expired(self, now: datetime) -> list[tuple[int, bytes]]:
+        burned = await asyncio.gather(*(shard.purge_expired(now) for shard in self.shards))
+        return [key for shard_keys in burned for key in shard_keys]
+
+    async def list_by_user(self, user_id: int) -> list[StoredSecret]:
+        return await self.shard_for(user_id).list_by_user(user_id)
+
+    async def usage(self, user_id: int) -> SecretUsage:
+        return await self.shard_for(user_id).usage(user_id)
+
+
+# хранилища, общие для всех запросов процесса, создаются при первом обращении
+_memory_storage: Optional[MemorySecretStorage] = None
+_redis_storage: Optional[RedisSecretStorage] = None
+
+
+def get_memory_storage() -> MemorySecretStorage:
+    """
+    Возвращает хранилище секретов в памяти процесса.
+
+    :return: хранилище в памяти (тип MemorySecretStorage)
+    """
+    global _memory_storage
+    if _memory_storage is None:
+        _memory_storage = MemorySecretStorage()
+    return _memory_storage
+
+
+def get_redis_storage() -> RedisSecretStorage:
+    """
+    Возвращает хранилище короткоживущих секретов в Redis.
+
+    :return: хранилище в Redis (тип RedisSecretStorage)
+    """
+    global _redis_storage
+    if _redis_storage is None:
+        _redis_storage = RedisSecretStorage(SECRET_HOT_TIER_REDIS_URL)
+    return _redis_storage
+
+
+async def close_redis_storage() -> None:
+    """
+    Закрывает соединения хранилища в Redis, если оно было создано.
+    """
+    global _redis_storage
+    if _redis_storage is not None:
+        await _redis_storage.redis.aclose()
+        _redis_storage = None
+
+
+def create_secret_storage(db: AsyncSession, shard_dbs: Optional[list[AsyncSession]] = None) -> SecretStorage:
+    """
+    Создает хранилище секретов в соответствии с настройками SECRET_STORAGE, SECRET_SHARD_URLS
+    и SECRET_HOT_TIER_ENABLED.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :param shard_dbs: экземпляры сессий шардов секретов (тип list[AsyncSession] или None)
+    :return: хранилище секретов (тип SecretStorage)
+    """
+    if SECRET_STORAGE == 'memory':
+        storage = get_memory_storage()
+    elif shard_dbs:
+        storage = ShardedSecretStorage([PostgresSecretStorage(shard_db) for shard_db in shard_dbs])
+    else:
+        storage = PostgresSecretStorage(db)
+    if SECRET_HOT_TIER_ENABLED:
+        return TieredSecretStorage(get_redis_storage(), storage, SECRET_HOT_TIER_LIFETIMES)
+    return storage
@@ -0,0 +1,204 @@
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from src.config import SERVER_HOST, SERVER_PORT, WEB_CONCURRENCY, SERVER_GRACEFUL_TIMEOUT, STARTUP_PROFILE, \
+    TOKEN_REVOCATION_STORAGE, IDEMPOTENCY_STORAGE, RATE_LIMIT_STORAGE, SECRET_STORAGE
+from src.auth.tokens import get_jwt_keys
+from src.database import load_database_driver
+from src.startup_profile import startup_profiler
+
+logger = logging.getLogger('uvicorn.error')
+
+# воркер, проработавший меньше этого времени в секундах, считается упавшим при запуске
+WORKER_MIN_UPTIME = 10.0
+# задержка перезапуска после первого быстрого падения и ее предел в секундах
+RESTART_DELAY = 0.5
+RESTART_MAX_DELAY = 30.0
+
+
+class RestartBackoff:
+    """
+    Экспоненциальная задержка перезапуска воркеров. Задержка удваивается после каждого быстрого падения,
+    поэтому воркер, который падает при запуске, не превращает сервер в непрерывный цикл fork.
+    Воркер, проработавший дольше WORKER_MIN_UPTIME, перезапускается сразу.
+    """
+
+    def __init__(self, min_uptime: float = WORKER_MIN_UPTIME, delay: float = RESTART_DELAY,
+                 max_delay: float = RESTART_MAX_DELAY):
+        self.min_uptime = min_uptime
+        self.initial_delay = delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+
+    def next_delay(self, uptime: float) -> float:
+        """
+        Возвращает задержку перед перезапуском завершившегося воркера.
+
+        :param uptime: время работы завершившегося воркера в секундах (тип float)
+        :return: задержка в секундах (тип float)
+        """
+        if uptime >= self.min_uptime:
+            self.delay = 0.0
+        else:
+            self.delay = min(self.max_delay, self.delay * 2 or self.initial_delay)
+        return self.delay
+
+
+def available_cpus() -> int:
+    """
+    Возвращает количество ядер, доступных процессу, с учетом привязки к ядрам и квоты CPU cgroup v2 в контейнере.
+
+    :return: количество ядер (тип int)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - sched_getaffinity есть не на всех платформах
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count() -> int:
+    """
+    Возвращает количество воркеров: WEB_CONCURRENCY или количество доступных ядер.
+
+    :return: количество воркеров (тип int)
+    """
+    return WEB_CONCURRENCY if WEB_CONCURRENCY > 0 else available_cpus()
+
+
+def process_local_storages() -> list[str]:
+    """
+    Возвращает настройки хранилищ, которые хранят состояние в памяти процесса.
+    С несколькими воркерами у каждого воркера такое хранилище свое: отозванный токен принимается другим воркером,
+    повтор запроса с Idempotency-Key создает второй секрет, а ограничение частоты запросов умножается
+    на количество воркеров.
+
+    :return: имена настроек со значением memory (тип list[str])
+    """
+    storages = {
+        'TOKEN_REVOCATION_STORAGE': TOKEN_REVOCATION_STORAGE,
+        'IDEMPOTENCY_STORAGE': IDEMPOTENCY_STORAGE,
+        'RATE_LIMIT_STORAGE': RATE_LIMIT_STORAGE,
+        'SECRET_STORAGE': SECRET_STORAGE,
+    }
+    return [name for name, storage in storages.items() if storage == 'memory']
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    """
+    Запускает сервер uvicorn в процессе воркера на общем сокете.
+    По SIGTERM сервер перестает принимать соединения, дожидается завершения текущих запросов
+    и выполняет завершение lifespan приложения.
+
+    :param config: конфигурация uvicorn с уже загруженным приложением (тип uvicorn.Config)
+    :param sock: слушающий сокет (тип socket.socket)
+    """
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> None:
+    """
+    Запускает приложение в нескольких процессах.
+
+    Приложение и драйвер базы данных загружаются один раз в родительском процессе, после чего воркеры
+    создаются через fork и разделяют уже импортированный код. Ресурсы воркера - пулы соединений и клиенты -
+    создаются в lifespan приложения уже после fork. Упавший воркер перезапускается с экспоненциальной задержкой,
+    а SIGTERM и SIGINT передаются воркерам для корректного завершения.
+    Ключи JWT разбираются до fork, поэтому воркеры получают их готовыми, а ошибка в ключах останавливает запуск.
+    С несколькими воркерами не запускается, если какое-либо хранилище общего состояния хранит его в памяти процесса.
+    С настройкой STARTUP_PROFILE выводит время импорта модулей приложения.
+    """
+    count = worker_count()
+    local_storages = process_local_storages()
+    if count > 1 and local_storages:
+        logger.error('Хранилища %s хранят состояние в памяти процесса и не работают с %s воркерами: '
+                     'используйте redis или WEB_CONCURRENCY=1', ', '.join(local_storages), count)
+        sys.exit(1)
+
+    config = uvicorn.Config('src.main:app', host=SERVER_HOST, port=SERVER_PORT, lifespan='on', proxy_headers=True,
+                            timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT)
+    if STARTUP_PROFILE:
+        startup_profiler.install()
+    with startup_profiler.step('load application'):
+        config.load()
+    with startup_profiler.step('load database driver'):
+        load_database_driver()
+    try:
+        with startup_profiler.step('prepare JWT keys'):
+            get_jwt_keys()
+    except (OSError, ValueError, RuntimeError):
+        logger.exception('Не удалось загрузить ключи JWT')
+        sys.exit(1)
+    if STARTUP_PROFILE:
+        startup_profiler.uninstall()
+        print(startup_profiler.report(), file=sys.stderr)
+    sock = config.bind_socket()
+    workers: dict[int, float] = {}
+    backoff = RestartBackoff()
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                run_worker(config, sock)
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info('Запуск %s воркеров', count)
+    for _ in range(count):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        uptime = time.monotonic() - workers.pop(pid)
+        if stopping:
+            continue
+        delay = backoff.next_delay(uptime)
+        logger.warning('Воркер %s завершился с кодом %s, новый запускается через %.1f с',
+                       pid, os.waitstatus_to_exitcode(status), delay)
+        # ожидание прерывается остановкой сервера
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(min(0.1, deadline - time.monotonic()))
+        if not stopping:
+            spawn()
+    sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy import pool
+
+from alembic import context
+
+from src.config import SECRET_SHARD_URLS
+from src.secret.shards import shard_metadata
+
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = shard_metadata()
+
+
+def shard_urls() -> list[str]:
+    """
+    Returns the shard URLs to migrate: the one passed with -x url=..., otherwise every SECRET_SHARD_URLS entry.
+    Each shard keeps its own alembic_version table.
+    """
+    url = context.get_x_argument(as_dictionary=True).get('url')
+    return [url] if url else SECRET_SHARD_URLS
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting the SQL of every shard to the script output."""
+    for url in shard_urls():
+        context.configure(
+            url=url,
+            target_metadata=target_metadata,
+            literal_binds=True,
+            dialect_opts={"paramstyle": "named"},
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode, one shard after another."""
+    for url in shard_urls():
+        connectable = create_engine(make_url(url).update_query_dict({'async_fallback': 'True'}),
+                                    poolclass=pool.NullPool)
+
+        with connectable.connect() as connection:
+            context.configure(
+                connection=connection, target_metadata=target_metadata,
+                compare_server_default=True,
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,64 @@
+"""create partitioned secrets and usage counters in a shard
+
+Revision ID: e3a7c1d9b5f2
+Revises: 
+Create Date: 2026-10-20 10:30:00.000000
+
+"""
+from datetime import date, datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c1d9b5f2'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# значения на момент создания ревизии; дальнейшие партиции создает задача maintain_secret_partitions
+PARTITION_DAYS_AHEAD = 16
+
+
+def create_partition_sql(day: date) -> str:
+    return (f"CREATE TABLE IF NOT EXISTS secrets_p{day:%Y%m%d} PARTITION OF secrets "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')")
+
+
+def upgrade() -> None:
+    # пользователи хранятся в основной базе данных, поэтому внешних ключей на таблицу users нет
+    op.execute("CREATE TYPE lifetime AS ENUM "
+               "('five_min', 'one_hour', 'twelve_hours', 'one_day', 'seven_days', 'fourteen_days')")
+    op.execute("""
+        CREATE TABLE secrets (
+            id SERIAL NOT NULL,
+            secret_content BYTEA NOT NULL,
+            passphrase BYTEA NOT NULL,
+            lifetime lifetime NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            user_id INTEGER,
+            PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.create_index(op.f('ix_secrets_id'), 'secrets', ['id'], unique=False)
+    op.create_index(op.f('ix_secrets_expires_at'), 'secrets', ['expires_at'], unique=False)
+    op.execute('CREATE TABLE secrets_default PARTITION OF secrets DEFAULT')
+    today = datetime.utcnow().date()
+    for offset in range(PARTITION_DAYS_AHEAD + 1):
+        op.execute(create_partition_sql(today + timedelta(days=offset)))
+
+    op.create_table('secret_usage',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('secret_count', sa.Integer(), nullable=False),
+    sa.Column('total_bytes', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('secret_usage')
+    op.execute('DROP TABLE secrets')
+    op.execute('DROP TYPE lifetime')
@@ -0,0 +1,167 @@
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib.abc import MetaPathFinder
+from typing import Iterator, Optional
+
+from src.config import STARTUP_PROFILE_TOP
+
+
+@dataclass
+class ImportTiming:
+    """
+    Время выполнения модуля при импорте: собственное и вместе с модулями, импортированными из него.
+    """
+    name: str
+    self_time: float = 0
+    total_time: float = 0
+
+
+class _TimedLoader:
+    """
+    Загрузчик, который измеряет время выполнения модуля и передает остальные вызовы исходному загрузчику.
+    После выполнения модуля исходный загрузчик возвращается в модуль и его спецификацию.
+    """
+
+    def __init__(self, loader, profiler: 'StartupProfiler'):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def exec_module(self, module) -> None:
+        module.__loader__ = module.__spec__.loader = self.loader
+        with self.profiler.timed_import(module.__name__):
+            self.loader.exec_module(module)
+
+
+class StartupProfiler(MetaPathFinder):
+    """
+    Профилировщик запуска процесса: измеряет время импорта каждого модуля и шагов инициализации.
+
+    После install() профилировщик стоит первым в sys.meta_path, находит модули через остальные искатели
+    и подменяет загрузчик, чтобы измерить выполнение модуля. Время вложенных импортов вычитается
+    из собственного времени модуля, как в python -X importtime.
+    """
+
+    def __init__(self):
+        self.imports: dict[str, ImportTiming] = {}
+        self.steps: list[tuple[str, float]] = []
+        self.import_time = 0.0
+        self.installed = False
+        self._local = threading.local()
+
+    def install(self) -> None:
+        """
+        Начинает измерять время импорта модулей.
+        """
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self.installed = True
+
+    def uninstall(self) -> None:
+        """
+        Прекращает измерять время импорта модулей. Собранные данные сохраняются.
+        """
+        if self.installed:
+            sys.meta_path.remove(self)
+            self.installed = False
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+        if spec is not None and spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    @contextmanager
+    def timed_import(self, name: str) -> Iterator[None]:
+        """
+        Измеряет время выполнения модуля и вычитает его из собственного времени импортирующего модуля.
+
+        :param name: имя модуля (тип str)
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        timing = ImportTiming(name)
+        stack.append(timing)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            timing.total_time = elapsed
+            timing.self_time += elapsed
+            if stack:
+                stack[-1].self_time -= elapsed
+            else:
+                self.import_time += elapsed
+            self.imports[name] = timing
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """
+        Измеряет время шага инициализации.
+
+        :param name: название шага (тип str)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self, top: Optional[int] = STARTUP_PROFILE_TOP) -> str:
+        """
+        Формирует отчет о времени запуска: самые долгие импорты по полному времени и шаги инициализации.
+
+        :param top: количество модулей в отчете, None - все модули (тип int или None)
+        :return: текст отчета (тип str)
+        """
+        imported = sorted(self.imports.values(), key=lambda timing: timing.total_time, reverse=True)
+        lines = [f'Импорт: {len(imported)} модулей, {self.import_time * 1000:.1f} мс',
+                 f'{"собственное, мс":>16} {"полное, мс":>12}  модуль']
+        for timing in imported[:top]:
+            lines.append(f'{timing.self_time * 1000:16.1f} {timing.total_time * 1000:12.1f}  {timing.name}')
+        if self.steps:
+            lines.append('Инициализация:')
+            for name, elapsed in self.steps:
+                lines.append(f'{elapsed * 1000:16.1f} {"":12}  {name}')
+        return '\n'.join(lines)
+
+
+startup_profiler = StartupProfiler()
+
+
+def main(modules: list[str]) -> None:
+    """
+    Импортирует модули с профилировщиком запуска и выводит отчет.
+
+    :param modules: имена модулей, по умолчанию src.main (тип list[str])
+    """
+    startup_profiler.install()
+    try:
+        for module in modules or ['src.main']:
+            importlib.import_module(module)
+    finally:
+        startup_profiler.uninstall()
+    print(startup_profiler.report(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Integer, String
 from sqlalchemy.orm import relationship
 
 from src.database import Base
@@ -12,5 +12,18 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
+    # увеличивается при каждом изменении пользователя, используется для ETag
+    version = Column(Integer, nullable=False, default=1, server_default='1')
 
     secrets = relationship('Secret', back_populates='user')
+
+
+class UsersWatermark(Base):
+    """
+    Модель для описания версии списка пользователей.
+    Единственная строка увеличивается в одной транзакции с добавлением, изменением и удалением пользователя,
+    поэтому проверка актуальности списка читает одну строку, а не всю таблицу пользователей.
+    """
+    __tablename__ = 'users_watermark'
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
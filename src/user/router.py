@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi_pagination import Page, Params
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.service import get_current_user
-from src.database import get_db
+from src.config import RATE_LIMIT_USER_CREATE_PER_IP, RATE_LIMIT_USER_CREATE_PER_ACCOUNT
+from src.database import get_db, get_read_db
+from src.rate_limit import RateLimiter
+from src.responses import ModelSerializer, etag_matches, make_etag, not_modified
 from src.user.models import User
 from src.user.schemas import UserOut, UserCreate, UserUpdate
 from src.user import service
 
 router = APIRouter()
 
+user_out_serializer = ModelSerializer(UserOut)
+user_page_serializer = ModelSerializer(Page[UserOut])
+user_create_rate_limiter = RateLimiter('user_create', per_ip=RATE_LIMIT_USER_CREATE_PER_IP,
+                                       per_account=RATE_LIMIT_USER_CREATE_PER_ACCOUNT)
 
-@router.post('/users/', response_model=UserOut, status_code=201, summary='Adds a new user to the database.',
+
+@router.post('/users/', response_model=UserOut, status_code=201, dependencies=[Depends(user_create_rate_limiter)],
+             summary='Adds a new user to the database.',
              description='This endpoint accepts user details and creates a new user record. '
                          'It returns the created user information upon successful creation.')
 async def add_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
@@ -19,7 +28,9 @@ async def add_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     :param user: The data containing the new user's information (email, password).
     :param db: The database session dependency for performing the user creation.
     :return: The created user information as an instance of UserOut.
+    :raises HTTPException: If the rate limit for the client or the email is exceeded, a 429 error will be raised.
     """
+    await user_create_rate_limiter.check_account(user.email)
     return await service.add_user(user, db)
 
 
@@ -41,31 +52,50 @@ async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends
 @router.get('/users/{user_id}', response_model=UserOut, summary='Retrieves the information of a specific user.',
             description='This endpoint returns the details of the user identified by the given user id. '
                         'The request is validated to ensure that the current user '
-                        'has permission to view the requested user information.')
-async def get_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+                        'has permission to view the requested user information. '
+                        'The response carries an ETag; a request with a matching If-None-Match '
+                        'header gets 304 Not Modified without a body.')
+async def get_user(user_id: int, request: Request, db: AsyncSession = Depends(get_read_db),
+                   current_user: User = Depends(get_current_user)):
     """
     :param user_id: The ID of the user to be retrieved.
-    :param db: The database session dependency for accessing user data.
+    :param request: The incoming request, checked for the If-None-Match header.
+    :param db: The read-only database session dependency (a replica when configured) for accessing user data.
     :param current_user: The currently authenticated user, used for permission checks.
-    :return: The requested user's information as an instance of UserOut.
+    :return: The requested user's information as an instance of UserOut, or 304 if the client copy is current.
     """
-    return await service.get_user(user_id, db)
+    if request.headers.get('if-none-match'):
+        version = await service.get_user_version(user_id, db)
+        etag = make_etag('user', user_id, version)
+        if version is not None and etag_matches(request, etag):
+            return not_modified(etag)
+    db_user = await service.get_user(user_id, db)
+    return user_out_serializer.response(db_user, etag=make_etag('user', user_id, db_user.version))
 
 
 @router.get('/users/', response_model=Page[UserOut], summary='Retrieve a paginated list of users.',
             description='This endpoint fetches a list of users from the database, '
-                        'allowing for pagination through the page and size parameters.')
-async def get_users(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user),
+                        'allowing for pagination through the page and size parameters. '
+                        'The response carries an ETag that changes whenever any user is added, '
+                        'updated or deleted; a request with a matching If-None-Match header '
+                        'gets 304 Not Modified without a body.')
+async def get_users(request: Request, db: AsyncSession = Depends(get_read_db),
+                    current_user: User = Depends(get_current_user),
                     page: int = Query(1, gt=0), size: int = Query(50, gt=0)):
     """
-    :param db: The database session to execute the query.
+    :param request: The incoming request, checked for the If-None-Match header.
+    :param db: The read-only database session (a replica when configured) to execute the query.
     :param current_user: The currently authenticated user making the request.
     :param page: The page number to retrieve (default is 1). Must be greater than 0.
     :param size: The number of users to return per page (default is 10). Must be greater than 0.
-    :return: A paginated response model containing the list of users.
+    :return: A paginated response model containing the list of users, or 304 if the client copy is current.
     """
+    # версия списка читается до страницы, поэтому страница не бывает старше своего ETag
+    etag = make_etag('users', page, size, await service.get_users_watermark(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     params = Params(page=page, size=size)
-    return await service.get_users(db, params)
+    return user_page_serializer.response(await service.get_users(db, params), etag=etag)
 
 
 @router.delete('/users/{user_id}', response_model=UserOut, summary='Deletes a specified user from the database.',
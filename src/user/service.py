@@ -1,14 +1,23 @@
+from typing import Optional
+
 from fastapi import HTTPException
 from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
-from passlib.context import CryptContext
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.user.models import User
+from src.audit.models import AuditEventType
+from src.audit.service import audit_log
+from src.auth.service import get_password_context
+from src.database import release_session
+from src.user.models import User, UsersWatermark
 from src.user.schemas import UserCreate, UserOut, UserUpdate
 
+# идентификатор единственной строки версии списка пользователей
+USERS_WATERMARK_ID = 1
+
 
 def hash_password(password: str) -> str:
     """
@@ -17,8 +26,19 @@ def hash_password(password: str) -> str:
     :param password: пароль для хеширования (тип str)
     :return: захешированный пароль (тип str)
     """
-    pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
-    return pwd_context.hash(password)
+    return get_password_context().hash(password)
+
+
+async def bump_users_watermark(db: AsyncSession) -> None:
+    """
+    Увеличивает версию списка пользователей без фиксации транзакции.
+    Строка версии создается при первом изменении списка.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    """
+    upsert = insert(UsersWatermark).values(id=USERS_WATERMARK_ID, version=1)
+    await db.execute(upsert.on_conflict_do_update(index_elements=[UsersWatermark.id],
+                                                  set_={'version': UsersWatermark.version + 1}))
 
 
 async def add_user(user: UserCreate, db: AsyncSession) -> UserOut:
@@ -33,8 +53,10 @@ async def add_user(user: UserCreate, db: AsyncSession) -> UserOut:
     db_user = User(email=user.email, password=hashed_password)
     db.add(db_user)
     try:
+        await bump_users_watermark(db)
         await db.commit()
         await db.refresh(db_user)
+        await release_session(db)
         return db_user
     except IntegrityError:
         await db.rollback()
@@ -62,9 +84,13 @@ async def update_user(user_id: int, current_user_id: int, user: UserUpdate, db:
     for var, value in vars(user).items():
         if value is not None:
             setattr(db_user, var, value)
+    # версия увеличивается в базе данных, чтобы одновременные изменения не получили одну версию
+    db_user.version = User.version + 1
+    await bump_users_watermark(db)
 
     await db.commit()
     await db.refresh(db_user)
+    await release_session(db)
     return db_user
 
 
@@ -78,11 +104,34 @@ async def get_user(user_id: int, db: AsyncSession) -> UserOut:
     """
     query = await db.execute(select(User).where(User.id == user_id))
     db_user = query.scalars().first()
+    await release_session(db)
     if db_user is None:
         raise HTTPException(status_code=404, detail='Пользователь не найден')
     return db_user
 
 
+async def get_user_version(user_id: int, db: AsyncSession) -> Optional[int]:
+    """
+    Получает версию пользователя без загрузки остальных полей.
+
+    :param user_id: идентификатор пользователя (тип int)
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :return: версия пользователя или None, если пользователь не найден (тип int или None)
+    """
+    return await db.scalar(select(User.version).where(User.id == user_id))
+
+
+async def get_users_watermark(db: AsyncSession) -> int:
+    """
+    Получает версию списка пользователей, которая увеличивается при любом изменении списка.
+
+    :param db: экземпляр сессии базы данных (тип AsyncSession)
+    :return: версия списка пользователей (тип int)
+    """
+    version = await db.scalar(select(UsersWatermark.version).where(UsersWatermark.id == USERS_WATERMARK_ID))
+    return version or 0
+
+
 async def get_users(db: AsyncSession, params: Params = Params()) -> Page[UserOut]:
     """
     Получает список всех пользователей с возможностью пагинации.
@@ -93,7 +142,9 @@ async def get_users(db: AsyncSession, params: Params = Params()) -> Page[UserOut
     :return: пагинированный список пользователей (тип Page[UserOut]).
     """
     query = select(User)
-    return await paginate(db, query, params)
+    page = await paginate(db, query, params)
+    await release_session(db)
+    return page
 
 
 async def delete_user(user_id: int, current_user_id: int, db: AsyncSession) -> UserOut:
@@ -110,5 +161,7 @@ async def delete_user(user_id: int, current_user_id: int, db: AsyncSession) -> U
     if db_user is None or user_id != current_user_id:
         raise HTTPException(status_code=404, detail='Пользователь не найден или отсутствуют права')
     await db.delete(db_user)
+    await bump_users_watermark(db)
     await db.commit()
+    audit_log.record(AuditEventType.user_delete, user_id)
     return db_user
@@ -0,0 +1,94 @@
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config import CELERY_DB_POOL_SIZE, SECRET_SHARD_URLS
+from src.database import DATABASE_URL
+
+T = TypeVar('T')
+
+# цикл событий и движок процесса воркера Celery живут между запусками задач,
+# поэтому соединения из пула используются повторно и всегда принадлежат одному циклу
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+_shard_engines: list[AsyncEngine] = []
+_shard_session_factories: list[sessionmaker] = []
+
+
+def start_runtime() -> None:
+    """
+    Создает цикл событий процесса воркера и движки основной базы данных и шардов секретов.
+    """
+    global _loop, _engine, _session_factory, _shard_engines, _shard_session_factories
+    if _loop is not None:
+        return
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    _engine = create_async_engine(DATABASE_URL, pool_size=CELERY_DB_POOL_SIZE, pool_pre_ping=True)
+    _session_factory = sessionmaker(bind=_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+    _shard_engines = [create_async_engine(url, pool_size=CELERY_DB_POOL_SIZE, pool_pre_ping=True)
+                      for url in SECRET_SHARD_URLS]
+    _shard_session_factories = [sessionmaker(bind=shard_engine, class_=AsyncSession, expire_on_commit=False,
+                                             autoflush=False) for shard_engine in _shard_engines]
+
+
+def stop_runtime() -> None:
+    """
+    Закрывает соединения движка и цикл событий процесса воркера.
+    """
+    global _loop, _engine, _session_factory, _shard_engines, _shard_session_factories
+    if _loop is None:
+        return
+    for db_engine in (_engine, *_shard_engines):
+        _loop.run_until_complete(db_engine.dispose())
+    _loop.run_until_complete(_loop.shutdown_asyncgens())
+    _loop.close()
+    _loop = _engine = _session_factory = None
+    _shard_engines, _shard_session_factories = [], []
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Возвращает фабрику сессий движка процесса воркера.
+
+    :return: фабрика сессий (тип sessionmaker)
+    """
+    start_runtime()
+    return _session_factory
+
+
+def get_shard_session_factories() -> list[sessionmaker]:
+    """
+    Возвращает фабрики сессий шардов секретов процесса воркера.
+
+    :return: фабрики сессий (тип list[sessionmaker])
+    """
+    start_runtime()
+    return _shard_session_factories
+
+
+def run(coroutine: Awaitable[T]) -> T:
+    """
+    Выполняет корутину в цикле событий процесса воркера.
+    Если цикл еще не создан (например, в пуле solo без worker_process_init), он создается при первом вызове.
+
+    :param coroutine: корутина задачи
+    :return: результат корутины
+    """
+    start_runtime()
+    return _loop.run_until_complete(coroutine)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs) -> None:
+    start_runtime()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_process(**kwargs) -> None:
+    stop_runtime()
@@ -1,48 +1,93 @@
-import asyncio
+from contextlib import AsyncExitStack
 from datetime import datetime
+from typing import Optional, Sequence
 
 from celery import shared_task
-from dateutil.relativedelta import relativedelta
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
-from src.database import AsyncSessionLocal
-from src.secret.models import Secret
+from src.audit.models import AuditEventType
+from src.audit.service import audit_row, insert_audit_rows
+from src.config import AUDIT_ENABLED, SECRET_PARTITION_DAYS_AHEAD
+from src.secret.partitions import is_partitioned, create_future_partitions, drop_expired_partitions
+from src.secret.storage import create_secret_storage
+from tasks.runtime import get_session_factory, get_shard_session_factories, run
 
 
-async def burn_secret_async():
+async def burn_secret_async(session_factory: sessionmaker, shard_session_factories: Sequence[sessionmaker] = ()):
     """
-    Удаляет из базы данных секреты, срок жизни которых истек.
+    Удаляет из хранилища секретов секреты, срок жизни которых истек.
+    Если секреты распределены по шардам, они удаляются во всех шардах одновременно.
+
+    :param session_factory: фабрика сессий базы данных (тип sessionmaker)
+    :param shard_session_factories: фабрики сессий шардов секретов (тип Sequence[sessionmaker])
+    """
+    async with session_factory() as session, AsyncExitStack() as stack:
+        shard_dbs = [await stack.enter_async_context(shard_session_factory())
+                     for shard_session_factory in shard_session_factories]
+        storage = create_secret_storage(session, shard_dbs)
+        now = datetime.utcnow()
+        burned_keys = await storage.purge_expired(now)
+        if AUDIT_ENABLED and burned_keys:
+            # задача уже работает пачкой, поэтому события записываются сразу одним INSERT
+            await insert_audit_rows(session, [audit_row(AuditEventType.secret_expire, user_id, passphrase, now)
+                                              for user_id, passphrase in burned_keys])
+            await session.commit()
+
+
+@shared_task
+def burn_secret():
     """
-    async with AsyncSessionLocal() as session:
-        current_datetime = datetime.utcnow()
+    Периодическая задача Celery для запуска асинхронной функции burn_secret_async
+    для удаления секретов из базы данных.
+    """
+    run(burn_secret_async(get_session_factory(), get_shard_session_factories()))
 
-        burn_time_5_minutes = current_datetime - relativedelta(minutes=5)
-        burn_time_1_hour = current_datetime - relativedelta(hours=1)
-        burn_twelve_hours = current_datetime - relativedelta(hours=12)
-        burn_one_day = current_datetime - relativedelta(days=1)
-        burn_seven_days = current_datetime - relativedelta(days=7)
-        burn_fourteen_days = current_datetime - relativedelta(days=14)
 
-        query = await session.execute(select(Secret).where(
-            (Secret.lifetime == '5 минут') & (Secret.created_at <= burn_time_5_minutes) |
-            (Secret.lifetime == '1 час') & (Secret.created_at <= burn_time_1_hour) |
-            (Secret.lifetime == '12 часов') & (Secret.created_at <= burn_twelve_hours) |
-            (Secret.lifetime == '1 день') & (Secret.created_at <= burn_one_day) |
-            (Secret.lifetime == '7 дней') & (Secret.created_at <= burn_seven_days) |
-            (Secret.lifetime == '14 дней') & (Secret.created_at <= burn_fourteen_days)
-        ))
+async def maintain_partitions(session: AsyncSession, now: datetime,
+                              audit_session: Optional[AsyncSession] = None) -> list[str]:
+    """
+    Удаляет партиции таблицы секретов базы данных, срок жизни всех секретов в которых истек,
+    и создает партиции на ближайшие дни. Для несекционированной таблицы ничего не делает.
+    Транзакция не фиксируется.
 
-        secrets_to_delete = query.scalars().all()
-        for secret in secrets_to_delete:
-            await session.delete(secret)
+    :param session: экземпляр сессии базы данных (тип AsyncSession)
+    :param now: текущее время UTC (тип datetime)
+    :param audit_session: экземпляр сессии базы данных с журналом аудита (тип AsyncSession или None,
+        если аудит не ведется)
+    :return: имена удаленных партиций (тип list[str])
+    """
+    if not await is_partitioned(session):
+        return []
+    dropped = await drop_expired_partitions(session, now, audit_session)
+    await create_future_partitions(session, now.date(), SECRET_PARTITION_DAYS_AHEAD)
+    return dropped
+
+
+async def maintain_secret_partitions_async(session_factory: sessionmaker,
+                                           shard_session_factories: Sequence[sessionmaker] = ()):
+    """
+    Обслуживает партиции таблицы секретов в основной базе данных и во всех шардах секретов
+    и записывает события истечения секретов удаленных партиций в журнал аудита основной базы данных.
+    Шарды фиксируются по отдельности, а журнал аудита - в одной транзакции с партициями основной базы данных.
+
+    :param session_factory: фабрика сессий базы данных (тип sessionmaker)
+    :param shard_session_factories: фабрики сессий шардов секретов (тип Sequence[sessionmaker])
+    """
+    now = datetime.utcnow()
+    async with session_factory() as session:
+        audit_session = session if AUDIT_ENABLED else None
+        for shard_session_factory in shard_session_factories:
+            async with shard_session_factory() as shard_session:
+                await maintain_partitions(shard_session, now, audit_session)
+                await shard_session.commit()
+        await maintain_partitions(session, now, audit_session)
         await session.commit()
 
 
 @shared_task
-def burn_secret():
+def maintain_secret_partitions():
     """
-    Периодическая задача Celery для запуска асинхронной функции burn_secret_async
-    для удаления секретов из базы данных.
+    Периодическая задача Celery для обслуживания партиций таблицы секретов.
     """
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(burn_secret_async())
+    run(maintain_secret_partitions_async(get_session_factory(), get_shard_session_factories()))
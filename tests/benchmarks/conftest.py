@@ -0,0 +1,113 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Generator
+
+import pytest
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+RUN_BENCHMARKS = os.getenv('RUN_BENCHMARKS', '').lower() in ('1', 'true', 'yes')
+BENCHMARK_SAVE = os.getenv('BENCHMARK_SAVE', '').lower() in ('1', 'true', 'yes')
+BENCHMARK_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', '0.25'))
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """
+    Пропускает микробенчмарки, если они не включены переменной окружения RUN_BENCHMARKS.
+    """
+    if RUN_BENCHMARKS:
+        return
+    skip = pytest.mark.skip(reason='микробенчмарки включаются переменной окружения RUN_BENCHMARKS=1')
+    benchmarks_dir = Path(__file__).parent
+    for item in items:
+        if benchmarks_dir in Path(item.fspath).parents:
+            item.add_marker(skip)
+
+
+class Benchmark:
+    """
+    Замеряет время выполнения функции и сравнивает его с сохраненным базовым значением.
+    """
+
+    def __init__(self, name: str, baseline: dict[str, float], results: dict[str, float]):
+        self.name = name
+        self.baseline = baseline
+        self.results = results
+
+    def __call__(self, func: Callable, *args, rounds: int = 5, iterations: int = 10, **kwargs) -> Any:
+        """
+        Замеряет синхронную функцию.
+
+        :param func: замеряемая функция
+        :param rounds: количество раундов замера (тип int)
+        :param iterations: количество вызовов функции в одном раунде (тип int)
+        :return: результат последнего вызова функции
+        """
+        result = func(*args, **kwargs)
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                result = func(*args, **kwargs)
+            timings.append((time.perf_counter() - started) / iterations)
+        self._check(statistics.median(timings))
+        return result
+
+    async def coroutine(self, func: Callable[..., Awaitable], *args, rounds: int = 5, iterations: int = 10,
+                        **kwargs) -> Any:
+        """
+        Замеряет корутинную функцию в текущем цикле событий.
+
+        :param func: замеряемая корутинная функция
+        :param rounds: количество раундов замера (тип int)
+        :param iterations: количество вызовов функции в одном раунде (тип int)
+        :return: результат последнего вызова функции
+        """
+        result = await func(*args, **kwargs)
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                result = await func(*args, **kwargs)
+            timings.append((time.perf_counter() - started) / iterations)
+        self._check(statistics.median(timings))
+        return result
+
+    def _check(self, elapsed: float) -> None:
+        """
+        Сохраняет результат замера и падает, если он хуже базового значения больше чем на порог.
+
+        :param elapsed: медианное время одного вызова в секундах (тип float)
+        """
+        self.results[self.name] = elapsed
+        expected = self.baseline.get(self.name)
+        if BENCHMARK_SAVE or expected is None:
+            return
+        limit = expected * (1 + BENCHMARK_THRESHOLD)
+        assert elapsed <= limit, (f'Регрессия производительности {self.name}: {elapsed * 1e6:.1f} мкс '
+                                  f'при базовом значении {expected * 1e6:.1f} мкс')
+
+
+@pytest.fixture(scope='session')
+def benchmark_results() -> Generator[dict[str, float], None, None]:
+    """
+    Собирает результаты замеров за сессию и при BENCHMARK_SAVE=1 записывает их в файл базовых значений.
+    """
+    results: dict[str, float] = {}
+    yield results
+    if BENCHMARK_SAVE and results:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+
+@pytest.fixture(scope='function')
+def benchmark(request: pytest.FixtureRequest, benchmark_results: dict[str, float]) -> Benchmark:
+    """
+    Создает и возвращает объект замера для текущего теста.
+    """
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    return Benchmark(request.node.name, baseline, benchmark_results)
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+
+import bcrypt
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi_pagination import Page, Params
+from pydantic import TypeAdapter
+
+from src.auth import service as auth_service
+from src.auth.service import create_access_token, get_current_user, verify_password
+from src.auth.tokens import decoded_token_cache
+from src.responses import ModelSerializer
+from src.secret.models import Lifetime, Secret
+from src.secret import service as secret_service
+from src.secret.schemas import SecretCreate, SecretOut
+from src.secret.service import cipher_suite
+from src.secret.storage import MemorySecretStorage
+from src.user.models import User
+from src.user.schemas import UserOut
+from src.user.service import hash_password
+from tests.benchmarks.conftest import Benchmark
+
+PAYLOAD_SIZES = [64, 4096, 65536, 1048576]
+BCRYPT_COSTS = [4, 8, 10]
+
+
+@pytest.mark.parametrize('size', PAYLOAD_SIZES)
+def test_encrypt(benchmark: Benchmark, size: int):
+    """
+    Замеряет шифрование секрета разного размера.
+    """
+    payload = b'x' * size
+    benchmark(cipher_suite.encrypt, payload)
+
+
+@pytest.mark.parametrize('size', PAYLOAD_SIZES)
+def test_decrypt(benchmark: Benchmark, size: int):
+    """
+    Замеряет расшифровку секрета разного размера.
+    """
+    token = cipher_suite.encrypt(b'x' * size)
+    assert benchmark(cipher_suite.decrypt, token) == b'x' * size
+
+
+@pytest.mark.parametrize('cost', BCRYPT_COSTS)
+def test_bcrypt_hash(benchmark: Benchmark, cost: int):
+    """
+    Замеряет хеширование пароля bcrypt с разной стоимостью.
+    """
+    benchmark(bcrypt.hashpw, b'111111', bcrypt.gensalt(cost), rounds=3, iterations=2)
+
+
+@pytest.mark.parametrize('cost', BCRYPT_COSTS)
+def test_verify_password(benchmark: Benchmark, cost: int):
+    """
+    Замеряет проверку пароля для хешей с разной стоимостью bcrypt.
+    """
+    hashed_password = bcrypt.hashpw(b'111111', bcrypt.gensalt(cost)).decode()
+    assert benchmark(verify_password, '111111', hashed_password, rounds=3, iterations=2)
+
+
+def test_hash_password(benchmark: Benchmark):
+    """
+    Замеряет хеширование пароля с настройками приложения.
+    """
+    benchmark(hash_password, '111111', rounds=3, iterations=1)
+
+
+def test_create_access_token(benchmark: Benchmark):
+    """
+    Замеряет создание JWT токена доступа.
+    """
+    benchmark(create_access_token, {'sub': 'test_email@example.com', 'fresh': True}, timedelta(minutes=30),
+              iterations=200)
+
+
+@pytest.fixture
+def fake_auth_user(monkeypatch: pytest.MonkeyPatch) -> User:
+    """
+    Подменяет загрузку пользователя из базы данных в get_current_user.
+    """
+    user = User(id=1, email='test_email@example.com', password='111111')
+
+    async def fake_get_user(email, db):
+        return user
+
+    monkeypatch.setattr(auth_service, 'get_user', fake_get_user)
+    return user
+
+
+class FakeSession:
+    """
+    Сессия без базы данных, которую get_current_user освобождает после загрузки пользователя.
+    """
+
+    async def close(self):
+        pass
+
+
+async def test_get_current_user_decode(benchmark: Benchmark, fake_auth_user: User):
+    """
+    Замеряет проверку подписи JWT в get_current_user без обращения к базе данных.
+    Кэш проверенных токенов очищается перед каждым вызовом.
+    """
+    token = create_access_token({'sub': fake_auth_user.email}, timedelta(minutes=30))
+
+    async def decode():
+        decoded_token_cache.clear()
+        return await get_current_user(FakeSession(), token)
+
+    assert await benchmark.coroutine(decode, iterations=200) is fake_auth_user
+
+
+async def test_get_current_user_cached(benchmark: Benchmark, fake_auth_user: User):
+    """
+    Замеряет get_current_user для токена из кэша проверенных токенов.
+    """
+    token = create_access_token({'sub': fake_auth_user.email}, timedelta(minutes=30))
+    assert await benchmark.coroutine(get_current_user, FakeSession(), token, iterations=200) is fake_auth_user
+
+
+def test_secret_out_serialization(benchmark: Benchmark):
+    """
+    Замеряет сериализацию ORM-объекта секрета через SecretOut.
+    """
+    secret = Secret(id=1, secret_content=b'x' * 128, passphrase=b'y' * 128, lifetime=Lifetime.one_hour, user_id=1,
+                    created_at=datetime.utcnow())
+    benchmark(lambda: SecretOut.model_validate(secret, from_attributes=True).model_dump_json(), iterations=500)
+
+
+def test_user_out_serialization(benchmark: Benchmark):
+    """
+    Замеряет сериализацию ORM-объекта пользователя через UserOut.
+    """
+    user = User(id=1, email='test_email@example.com', password='111111')
+    benchmark(lambda: UserOut.model_validate(user, from_attributes=True).model_dump_json(), iterations=500)
+
+
+def test_user_page_response_model(benchmark: Benchmark):
+    """
+    Замеряет ответ со списком пользователей через повторную валидацию response_model и json.dumps.
+    """
+    page = Page[UserOut].create([User(id=i, email=f'user{i}@example.com', password='111111') for i in range(50)],
+                                total=50, params=Params(page=1, size=50))
+    adapter = TypeAdapter(Page[UserOut])
+    benchmark(lambda: JSONResponse(jsonable_encoder(adapter.validate_python(page, from_attributes=True))),
+              iterations=100)
+
+
+def test_user_page_prebuilt_serializer(benchmark: Benchmark):
+    """
+    Замеряет ответ со списком пользователей через заранее построенный сериализатор.
+    """
+    page = Page[UserOut].create([User(id=i, email=f'user{i}@example.com', password='111111') for i in range(50)],
+                                total=50, params=Params(page=1, size=50))
+    serializer = ModelSerializer(Page[UserOut])
+    benchmark(serializer.response, page, iterations=100)
+
+
+async def test_secret_service_memory_roundtrip(benchmark: Benchmark):
+    """
+    Замеряет создание и чтение секрета сервисом без затрат базы данных.
+    """
+    storage = MemorySecretStorage()
+    secret = SecretCreate(lifetime=Lifetime.five_min, secret_content=b'x' * 128, passphrase=b'passphrase')
+
+    async def roundtrip():
+        secret_key = await secret_service.generate_secret(secret, 1, storage)
+        return await secret_service.get_secret(secret_key.passphrase, 1, storage)
+
+    await benchmark.coroutine(roundtrip, iterations=200)
@@ -8,11 +8,15 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
+from src.audit.service import audit_log
+from src.auth.revocation import get_revocation_store
 from src.auth.service import create_access_token
 from src.config import POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB_TEST, \
     ACCESS_TOKEN_EXPIRE_MINUTES
-from src.database import get_db, Base
+from src.database import get_db, get_read_db, Base
+from src.idempotency import get_idempotency_storage
 from src.main import app
+from src.rate_limit import get_rate_limit_storage
 from src.user.models import User
 
 DATABASE_URL_TEST = (f'postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@'
@@ -53,8 +57,29 @@ async def async_client() -> AsyncGenerator[AsyncClient, None]:
     :return:
     """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    await get_rate_limit_storage().clear()
+    await get_revocation_store().clear()
+    await get_idempotency_storage().clear()
+    audit_log.session_factory = AsyncSessionLocal
     async with AsyncClient(app=app, base_url='http://test') as a_client:
         yield a_client
+    # события записываются до удаления таблиц
+    await audit_log.stop()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> None:
+    """
+    Подменяет клиенты Redis, которые создаются через Redis.from_url, клиентами fakeredis с общим сервером.
+    Тест пропускается, если fakeredis или lupa для скриптов Lua не установлены.
+    """
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    from redis.asyncio import Redis
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(Redis, 'from_url', lambda url, **kwargs: fakeredis.FakeAsyncRedis(server=server))
 
 
 @pytest.fixture(scope='session')
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.admission import AdmissionController, AdmissionControlMiddleware, Overloaded, RouteClass, \
+    classify_request, SECRET_READS, USER_LISTING, DEFAULT
+
+HIGH = RouteClass('high', priority=0, max_concurrency=1, max_queue=4)
+LOW = RouteClass('low', priority=1, max_concurrency=1, max_queue=1)
+
+
+def test_classify_request():
+    """
+    Тестирует определение класса маршрута запроса.
+    """
+    assert classify_request('GET', '/api/secrets/abc') is SECRET_READS, 'Чтение секрета не получило приоритет'
+    assert classify_request('GET', '/api/users/') is USER_LISTING, 'Список пользователей не выделен в свой класс'
+    assert classify_request('GET', '/api/users/1') is DEFAULT
+    assert classify_request('POST', '/api/generate/') is DEFAULT
+
+
+async def test_admission_queue_limit_and_deadline():
+    """
+    Тестирует немедленный отказ при заполненной очереди и отказ по истечении времени ожидания.
+    """
+    controller = AdmissionController(total_concurrency=1, queue_timeout=0.05, route_classes=[HIGH, LOW])
+    await controller.acquire(LOW)
+    waiter = asyncio.create_task(controller.acquire(LOW))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        await controller.acquire(LOW)
+    with pytest.raises(Overloaded):
+        await waiter
+    assert controller.queued['low'] == 0, 'Запрос остался в очереди после истечения времени ожидания'
+
+    controller.release(LOW)
+    await controller.acquire(LOW)
+    assert controller.active_total == 1, 'Место не было освобождено'
+
+
+async def test_admission_priority():
+    """
+    Тестирует, что освободившееся место получает запрос с более высоким приоритетом.
+    """
+    controller = AdmissionController(total_concurrency=1, queue_timeout=1, route_classes=[HIGH, LOW])
+    await controller.acquire(LOW)
+    order = []
+
+    async def admitted(route_class: RouteClass) -> None:
+        await controller.acquire(route_class)
+        order.append(route_class.name)
+        controller.release(route_class)
+
+    low = asyncio.create_task(admitted(LOW))
+    await asyncio.sleep(0)
+    high = asyncio.create_task(admitted(HIGH))
+    await asyncio.sleep(0)
+    controller.release(LOW)
+    await asyncio.gather(low, high)
+    assert order == ['high', 'low'], 'Запрос с высоким приоритетом не был принят первым'
+
+
+async def test_admission_middleware_returns_503():
+    """
+    Тестирует ответ 503 с заголовком Retry-After при перегрузке.
+    """
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse('ok')
+
+    controller = AdmissionController(total_concurrency=1, queue_timeout=0.05, route_classes=[DEFAULT])
+    app = Starlette(routes=[Route('/slow', slow)])
+    app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    async with AsyncClient(app=app, base_url='http://test') as client:
+        first = asyncio.create_task(client.get('/slow'))
+        await asyncio.sleep(0.01)
+        response = await client.get('/slow')
+        assert response.status_code == 503, 'Запрос сверх лимита не был отклонен'
+        assert response.headers['Retry-After'] == '1', 'Ответ не содержит Retry-After'
+        release.set()
+        assert (await first).status_code == 200
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from src.audit.models import AuditEvent, AuditEventType
+from src.audit.service import AuditLog, audit_log
+from src.user.models import User
+from tests.conftest import AsyncSessionLocal, create_test_auth_headers_for_user
+
+
+async def test_secret_lifecycle_audit(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует запись событий создания и чтения секрета в журнал аудита.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    headers = create_test_auth_headers_for_user(test_user.email)
+    secret_data = {'lifetime': '5 минут', 'secret_content': 'secret_content', 'passphrase': 'passphrase'}
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    secret_key = response.json().get('passphrase')
+    response = await async_client.get(f'/api/secrets/{secret_key}', headers=headers)
+    assert response.status_code == 200, 'Не удалось найти секрет'
+
+    await audit_log.stop()
+    async with AsyncSessionLocal() as session:
+        events = (await session.execute(select(AuditEvent).order_by(AuditEvent.id))).scalars().all()
+    assert [event.event for event in events] == [AuditEventType.secret_create, AuditEventType.secret_read], \
+        'События не были записаны в журнал аудита'
+    secret_ref = hashlib.sha256(secret_key.encode()).hexdigest()
+    assert all(event.secret_ref == secret_ref and event.user_id == test_user.id for event in events), \
+        'Записи журнала аудита не указывают на секрет и пользователя'
+
+
+async def test_audit_batches_by_size():
+    """
+    Тестирует запись пачки событий, как только набирается batch_size, не дожидаясь flush_interval.
+    """
+    log = AuditLog(batch_size=3, flush_interval=60, enabled=True, session_factory=AsyncSessionLocal)
+    for user_id in range(3):
+        log.record(AuditEventType.user_delete, user_id)
+    for _ in range(100):
+        if log.written:
+            break
+        await asyncio.sleep(0.01)
+    await log.stop()
+    assert log.written == 3, 'Пачка событий не была записана'
+
+
+async def test_audit_queue_overflow():
+    """
+    Тестирует отбрасывание событий при переполнении очереди.
+    """
+    log = AuditLog(maxsize=2, enabled=True, session_factory=AsyncSessionLocal)
+    for user_id in range(5):
+        log.record(AuditEventType.user_delete, user_id)
+    assert log.dropped == 3, 'Лишние события не были отброшены'
+    await log.stop()
+    assert log.written == 2, 'События из очереди не были записаны при остановке'
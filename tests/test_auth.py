@@ -1,5 +1,9 @@
+import time
+from datetime import timedelta
+
 from httpx import AsyncClient
 
+from src.auth.service import create_refresh_token
 from src.user.models import User
 
 
@@ -32,7 +36,162 @@ async def test_refresh_token(async_client: AsyncClient, test_user: User):
                                                                              'password': '111111'})
     assert access_token_response.status_code == 200, 'Не удалось получить токен'
 
-    token = access_token_response.json().get('access_token')
-    print(token)
+    token = access_token_response.json().get('refresh_token')
     refresh_token_response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': token})
     assert refresh_token_response.status_code == 200, 'Не удалось получить токен'
+
+
+async def test_refresh_token_rotation(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует, что refresh-токен нельзя использовать повторно, а access-токен не принимается вместо него.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    user_data = {'email': 'test_email@example.com', 'password': '111111'}
+    response = await async_client.post('/api/users/', json=user_data)
+    assert response.status_code == 201, 'Пользователь не был добавлен'
+    tokens = (await async_client.post('/api/auth/login', json=user_data)).json()
+
+    response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': tokens['access_token']})
+    assert response.status_code == 401, 'Access-токен был принят как refresh-токен'
+
+    response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200, 'Не удалось обновить токены'
+    new_refresh_token = response.json()['refresh_token']
+
+    response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401, 'Использованный refresh-токен был принят повторно'
+    response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': new_refresh_token})
+    assert response.status_code == 200, 'Новый refresh-токен не был принят'
+
+
+async def test_refresh_token_rejected_as_access_token(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует, что refresh-токен не принимается в заголовке Authorization вместо access-токена.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    refresh_token = create_refresh_token({'sub': test_user.email}, timedelta(minutes=30))
+    response = await async_client.get(f'/api/users/{test_user.id}',
+                                      headers={'Authorization': f'Bearer {refresh_token}'})
+    assert response.status_code == 401, 'Refresh-токен был принят как access-токен'
+
+
+async def test_logout(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует отзыв access- и refresh-токенов при выходе.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    user_data = {'email': 'test_email@example.com', 'password': '111111'}
+    response = await async_client.post('/api/users/', json=user_data)
+    assert response.status_code == 201, 'Пользователь не был добавлен'
+    tokens = (await async_client.post('/api/auth/login', json=user_data)).json()
+    user_id = response.json()['id']
+    headers = {'Authorization': f'Bearer {tokens["access_token"]}'}
+
+    response = await async_client.get(f'/api/users/{user_id}', headers=headers)
+    assert response.status_code == 200, 'Токен не был принят до выхода'
+    response = await async_client.post('/api/auth/logout', json={'refresh_token': tokens['refresh_token']},
+                                       headers=headers)
+    assert response.status_code == 204, 'Не удалось выйти'
+
+    response = await async_client.get(f'/api/users/{user_id}', headers=headers)
+    assert response.status_code == 401, 'Отозванный access-токен был принят'
+    response = await async_client.post('/api/auth/refresh_token', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 401, 'Отозванный refresh-токен был принят'
+
+
+async def test_memory_revocation_store_expiry():
+    """
+    Тестирует удаление записей хранилища отозванных токенов после истечения срока жизни токена.
+    """
+    from src.auth.revocation import MemoryRevocationStore
+
+    store = MemoryRevocationStore()
+    assert await store.revoke('active', time.time() + 60), 'Токен не был отозван'
+    assert not await store.revoke('active', time.time() + 60), 'Токен был отозван повторно'
+    assert await store.revoke('expired', time.time() - 1), 'Токен не был отозван'
+    assert await store.is_revoked('active'), 'Отозванный токен не найден'
+
+    await store.revoke('other', time.time() + 60)
+    assert 'expired' not in store._revoked, 'Запись просроченного токена не была удалена'
+
+
+def test_decode_token_uses_cache(monkeypatch):
+    """
+    Тестирует, что повторная проверка того же токена не декодирует его заново.
+
+    :param monkeypatch: фикстура для подмены атрибутов
+    """
+    from src.auth import tokens
+
+    tokens.decoded_token_cache.clear()
+    token = tokens.encode_token({'sub': 'cached@example.com', 'exp': time.time() + 60})
+    assert tokens.decode_token(token)['sub'] == 'cached@example.com', 'Токен не был декодирован'
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError('Токен декодирован повторно')
+
+    monkeypatch.setattr(tokens.jwt, 'decode', fail_decode)
+    assert tokens.decode_token(token)['sub'] == 'cached@example.com', 'Токен не был взят из кэша'
+    tokens.decoded_token_cache.clear()
+
+
+def test_decoded_token_cache_expiry_and_eviction():
+    """
+    Тестирует удаление просроченных и самых старых записей из кэша проверенных токенов.
+    """
+    from src.auth.tokens import DecodedTokenCache
+
+    cache = DecodedTokenCache(maxsize=2)
+    cache.put('expired', {'exp': time.time() - 1})
+    assert cache.get('expired') is None, 'Просроченный токен был взят из кэша'
+
+    for token in ('first', 'second', 'third'):
+        cache.put(token, {'exp': time.time() + 60})
+    assert cache.get('first') is None, 'Самая старая запись не была вытеснена'
+    assert cache.get('third') is not None, 'Новая запись отсутствует в кэше'
+
+
+def test_eddsa_keys(monkeypatch, tmp_path):
+    """
+    Тестирует подпись закрытым ключом Ed25519 и проверку только открытым ключом.
+
+    :param monkeypatch: фикстура для подмены атрибутов
+    :param tmp_path: временная директория для файлов ключей
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    from src.auth import tokens
+
+    private_key = Ed25519PrivateKey.generate()
+    private_path = tmp_path / 'private.pem'
+    public_path = tmp_path / 'public.pem'
+    private_path.write_bytes(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                       serialization.NoEncryption()))
+    public_path.write_bytes(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                                  serialization.PublicFormat.SubjectPublicKeyInfo))
+
+    monkeypatch.setattr(tokens, 'JWT_ALGORITHM', 'EdDSA')
+    monkeypatch.setattr(tokens, 'JWT_PRIVATE_KEY_PATH', str(private_path))
+    monkeypatch.setattr(tokens, 'JWT_PUBLIC_KEY_PATH', None)
+    tokens.get_jwt_keys.cache_clear()
+    tokens.decoded_token_cache.clear()
+    try:
+        token = tokens.encode_token({'sub': 'eddsa@example.com', 'exp': time.time() + 60})
+
+        # сервису, который только проверяет токены, достаточно открытого ключа
+        monkeypatch.setattr(tokens, 'JWT_PRIVATE_KEY_PATH', None)
+        monkeypatch.setattr(tokens, 'JWT_PUBLIC_KEY_PATH', str(public_path))
+        tokens.get_jwt_keys.cache_clear()
+        keys = tokens.get_jwt_keys()
+        assert keys.signing_key is None, 'Закрытый ключ не должен быть загружен'
+        assert tokens.decode_token(token)['sub'] == 'eddsa@example.com', 'Токен не прошел проверку'
+    finally:
+        tokens.get_jwt_keys.cache_clear()
+        tokens.decoded_token_cache.clear()
@@ -0,0 +1,86 @@
+import re
+
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.body_limit import BodySizeLimitMiddleware
+from src.config import SECRET_QUOTA_MAX_SECRET_SIZE, SECRET_REQUEST_MAX_BODY_SIZE
+from src.secret import service
+from src.user.models import User
+from tests.conftest import create_test_auth_headers_for_user
+
+
+def make_app(received: list[int]) -> BodySizeLimitMiddleware:
+    """
+    Создает приложение, которое читает тело запроса по частям, с ограничением размера тела.
+
+    :param received: список, в который записывается количество прочитанных приложением байт (тип list[int])
+    :return: приложение с middleware (тип BodySizeLimitMiddleware)
+    """
+    async def upload(request: Request) -> PlainTextResponse:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            received.append(size)
+        return PlainTextResponse(str(size))
+
+    app = Starlette(routes=[Route('/upload', upload, methods=['POST']), Route('/small', upload, methods=['POST'])])
+    return BodySizeLimitMiddleware(app, default_limit=10, route_limits=[('POST', re.compile('^/upload$'), 100)])
+
+
+async def test_body_limit_content_length():
+    """
+    Тестирует отказ по заголовку Content-Length без чтения тела и ограничения для отдельных маршрутов.
+    """
+    received = []
+    async with AsyncClient(app=make_app(received), base_url='http://test') as client:
+        response = await client.post('/upload', content=b'x' * 101)
+        assert response.status_code == 413, 'Запрос больше ограничения маршрута не был отклонен'
+        assert received == [], 'Приложение не должно читать тело отклоненного запроса'
+
+        assert (await client.post('/upload', content=b'x' * 100)).text == '100'
+        assert (await client.post('/small', content=b'x' * 11)).status_code == 413, \
+            'Для маршрута без собственного ограничения должно действовать общее'
+
+
+async def test_body_limit_streaming():
+    """
+    Тестирует отказ при получении тела без Content-Length, как только прочитанный размер превысит ограничение.
+    """
+    received = []
+
+    async def chunks():
+        for _ in range(1000):
+            yield b'x' * 30
+
+    async with AsyncClient(app=make_app(received), base_url='http://test') as client:
+        response = await client.post('/upload', content=chunks())
+    assert response.status_code == 413, 'Запрос больше ограничения маршрута не был отклонен'
+    assert max(received) <= 100, 'Приложение получило тело больше ограничения'
+
+
+async def test_generate_secret_size_limits(async_client: AsyncClient, test_user: User, monkeypatch):
+    """
+    Тестирует, что слишком большой секрет отклоняется до шифрования.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    :param monkeypatch: фикстура для подмены атрибутов
+    """
+    def encrypt(data: bytes) -> bytes:
+        raise AssertionError('Слишком большой секрет не должен шифроваться')
+
+    monkeypatch.setattr(service.cipher_suite, 'encrypt', encrypt)
+    headers = create_test_auth_headers_for_user(test_user.email)
+
+    secret_data = {'lifetime': '5 минут', 'secret_content': 'x' * (SECRET_QUOTA_MAX_SECRET_SIZE + 1),
+                   'passphrase': 'passphrase'}
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert response.status_code == 422, 'Секрет больше SECRET_QUOTA_MAX_SECRET_SIZE не был отклонен'
+
+    secret_data['secret_content'] = 'x' * SECRET_REQUEST_MAX_BODY_SIZE
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert response.status_code == 413, 'Тело больше SECRET_REQUEST_MAX_BODY_SIZE не было отклонено'
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.idempotency import IdempotencyCache, MemoryIdempotencyStorage, request_fingerprint
+from src.secret.models import Secret
+from src.user.models import User
+from tests.conftest import AsyncSessionLocal, create_test_auth_headers_for_user
+
+
+async def test_generate_secret_idempotency_key(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует, что повтор запроса с тем же Idempotency-Key возвращает исходный ответ без создания нового секрета.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    headers = {**create_test_auth_headers_for_user(test_user.email), 'Idempotency-Key': 'retry-1'}
+    secret_data = {'lifetime': '5 минут', 'secret_content': 'secret_content', 'passphrase': 'passphrase'}
+    first = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    retry = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert first.status_code == retry.status_code == 201, 'Секрет не был добавлен'
+    assert retry.json() == first.json(), 'Повтор вернул другой ответ'
+    assert retry.headers['Idempotent-Replayed'] == 'true', 'Повтор не отмечен в заголовке'
+
+    async with AsyncSessionLocal() as session:
+        count = (await session.execute(select(func.count()).select_from(Secret))).scalar()
+    assert count == 1, 'Повтор запроса создал еще один секрет'
+
+    response = await async_client.post('/api/generate/', headers=headers, json={**secret_data, 'lifetime': '1 час'})
+    assert response.status_code == 422, 'Ключ идемпотентности был принят для другого запроса'
+
+
+async def test_idempotency_coalesces_concurrent_requests():
+    """
+    Тестирует, что одновременные запросы с одним ключом выполняют обработчик один раз.
+    """
+    storage = MemoryIdempotencyStorage()
+    cache = IdempotencyCache(lambda: storage)
+    calls = 0
+
+    async def produce() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b'{"passphrase": "key"}'
+
+    fingerprint = request_fingerprint(b'body')
+    results = await asyncio.gather(*(cache.run('1:key', fingerprint, produce) for _ in range(3)))
+    assert calls == 1, 'Обработчик был выполнен несколько раз'
+    assert sorted(replayed for _, replayed in results) == [False, True, True], 'Повторы не были объединены'
+    assert {body for body, _ in results} == {b'{"passphrase": "key"}'}, 'Повторы получили другой ответ'
+
+
+async def test_idempotency_failure_releases_key():
+    """
+    Тестирует, что ошибка обработчика не сохраняется и запрос можно повторить.
+    """
+    storage = MemoryIdempotencyStorage()
+    cache = IdempotencyCache(lambda: storage)
+
+    async def fail() -> bytes:
+        raise HTTPException(status_code=403, detail='Квота')
+
+    async def produce() -> bytes:
+        return b'ok'
+
+    fingerprint = request_fingerprint(b'body')
+    with pytest.raises(HTTPException):
+        await cache.run('1:key', fingerprint, fail)
+    assert await cache.run('1:key', fingerprint, produce) == (b'ok', False), 'Запрос после ошибки не был выполнен'
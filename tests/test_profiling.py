@@ -0,0 +1,60 @@
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.auth import service as auth_service
+from src.profiling import router as profiling_router
+from src.profiling import service as profiling_service
+from src.profiling.middleware import ProfilingMiddleware
+
+
+@pytest.fixture(scope='function')
+def profiling_app(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> FastAPI:
+    """
+    Создает приложение с включенным профилированием и административным токеном.
+    """
+    monkeypatch.setattr(auth_service, 'PROFILING_ADMIN_TOKEN', 'admin-token')
+    monkeypatch.setattr(profiling_service, 'PROFILING_OUTPUT_DIR', str(tmp_path))
+    app = FastAPI()
+
+    @app.get('/ping')
+    async def ping():
+        return {'status': 'ok'}
+
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profiling_router.router, prefix='/api/debug')
+    return app
+
+
+async def test_profile_request_by_header(profiling_app: FastAPI):
+    """
+    Тестирует профилирование запроса по заголовку X-Profile.
+
+    :param profiling_app: приложение с включенным профилированием
+    """
+    async with AsyncClient(app=profiling_app, base_url='http://test') as client:
+        response = await client.get('/ping', headers={'X-Profile': 'cprofile', 'X-Admin-Token': 'admin-token'})
+        assert response.status_code == 200
+        assert Path(response.headers['X-Profile-Output']).exists(), 'Файл профиля не был записан'
+
+        response = await client.get('/ping', headers={'X-Profile': 'cprofile', 'X-Admin-Token': 'wrong'})
+        assert 'X-Profile-Output' not in response.headers, 'Запрос без прав не должен профилироваться'
+
+
+async def test_sample_profile(profiling_app: FastAPI):
+    """
+    Тестирует сэмплирование стеков воркера в формате collapsed stacks.
+
+    :param profiling_app: приложение с включенным профилированием
+    """
+    async with AsyncClient(app=profiling_app, base_url='http://test') as client:
+        response = await client.get('/api/debug/profile/sample', params={'seconds': 0.05})
+        assert response.status_code == 403, 'Эндпоинт должен требовать административный токен'
+
+        response = await client.get('/api/debug/profile/sample', params={'seconds': 0.05},
+                                    headers={'X-Admin-Token': 'admin-token'})
+        assert response.status_code == 200
+        stack, count = response.text.splitlines()[0].rsplit(' ', 1)
+        assert ';' in stack and int(count) > 0
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from src import rate_limit
+from src.config import RATE_LIMIT_LOGIN_PER_IP
+from src.main import app
+from src.rate_limit import Rate, RedisSlidingWindowStorage
+
+
+async def test_login_rate_limit_per_account(async_client: AsyncClient):
+    """
+    Тестирует ограничение частоты попыток входа для одной учетной записи.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    """
+    response = await async_client.post('/api/users/', json={'email': 'test_email@example.com', 'password': '111111'})
+    assert response.status_code == 201, 'Пользователь не был добавлен'
+    credentials = {'email': 'test_email@example.com', 'password': 'wrong_password'}
+    for _ in range(5):
+        response = await async_client.post('/api/auth/login', json=credentials)
+        assert response.status_code == 401, 'Неверный пароль должен возвращать 401'
+
+    response = await async_client.post('/api/auth/login', json=credentials)
+    assert response.status_code == 429, 'Превышение ограничения должно возвращать 429'
+    assert int(response.headers['Retry-After']) > 0
+
+    response = await async_client.post('/api/auth/login', json={'email': 'other@example.com', 'password': '111111'})
+    assert response.status_code == 401, 'Ограничение одной учетной записи не должно влиять на другие'
+
+
+async def test_login_rate_limit_per_ip(async_client: AsyncClient):
+    """
+    Тестирует ограничение частоты попыток входа с одного IP-адреса для разных учетных записей.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    """
+    limit = Rate.parse(RATE_LIMIT_LOGIN_PER_IP).limit
+    for number in range(limit):
+        response = await async_client.post('/api/auth/login', json={'email': f'user{number}@example.com',
+                                                                    'password': '111111'})
+        assert response.status_code == 401, 'Запрос в пределах ограничения не должен отклоняться'
+
+    credentials = {'email': 'other@example.com', 'password': '111111'}
+    response = await async_client.post('/api/auth/login', json=credentials)
+    assert response.status_code == 429, 'Превышение ограничения для IP-адреса должно возвращать 429'
+
+    transport = ASGITransport(app=app, client=('10.0.0.2', 1234))
+    async with AsyncClient(transport=transport, base_url='http://test') as other_client:
+        response = await other_client.post('/api/auth/login', json=credentials)
+    assert response.status_code == 401, 'Ограничение одного IP-адреса не должно влиять на другие'
+
+
+async def test_redis_sliding_window(fake_redis, monkeypatch):
+    """
+    Тестирует скрипт скользящего окна в Redis: запросы сверх ограничения отклоняются до тех пор,
+    пока самый старый запрос не выйдет из окна.
+
+    :param fake_redis: фикстура, подменяющая Redis на fakeredis
+    :param monkeypatch: фикстура для подмены атрибутов
+    """
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(time=lambda: clock.now))
+    storage = RedisSlidingWindowStorage('redis://test')
+    rate = Rate(limit=3, period=60)
+
+    for offset in (0, 10, 20):
+        clock.now = 1000.0 + offset
+        assert await storage.hit('login:ip:1', rate) == 0, 'Запрос в пределах ограничения не должен отклоняться'
+    assert await storage.hit('login:ip:1', rate) == pytest.approx(40), \
+        'Повторить запрос можно, когда самый старый запрос выйдет из окна'
+    assert await storage.hit('login:ip:2', rate) == 0, 'Ограничение одного ключа не должно влиять на другие'
+
+    clock.now = 1061.0
+    assert await storage.hit('login:ip:1', rate) == 0, 'Запрос после выхода старого запроса из окна был отклонен'
+    assert await storage.hit('login:ip:1', rate) > 0
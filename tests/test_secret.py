@@ -1,5 +1,7 @@
 from httpx import AsyncClient
 
+from src.secret import service
+from src.secret.cache import negative_cache
 from src.user.models import User
 from tests.conftest import create_test_auth_headers_for_user
 
@@ -34,3 +36,48 @@ async def test_get_secret(async_client: AsyncClient, test_user: User):
     response = await async_client.get(f'/api/secrets/{secret_key}',
                                       headers=create_test_auth_headers_for_user(test_user.email))
     assert response.status_code == 200, 'Не удалось найти секрет'
+
+
+async def test_get_burned_secret(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует повторное получение прочитанного секрета из негативного кэша без запроса к базе данных.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    :return:
+    """
+    secret_data = {'lifetime': '5 минут', 'secret_content': 'secret_content', 'passphrase': 'passphrase'}
+    response = await async_client.post('/api/generate/', headers=create_test_auth_headers_for_user(test_user.email),
+                                       json=secret_data)
+    secret_key = response.json().get('passphrase')
+    response = await async_client.get(f'/api/secrets/{secret_key}',
+                                      headers=create_test_auth_headers_for_user(test_user.email))
+    assert response.status_code == 200, 'Не удалось найти секрет'
+    assert (test_user.id, secret_key.encode()) in negative_cache, 'Прочитанный ключ не попал в негативный кэш'
+
+    response = await async_client.get(f'/api/secrets/{secret_key}',
+                                      headers=create_test_auth_headers_for_user(test_user.email))
+    assert response.status_code == 404, 'Секрет можно прочитать только один раз'
+
+
+async def test_secret_quota(async_client: AsyncClient, test_user: User, monkeypatch):
+    """
+    Тестирует отказ в создании секрета сверх квоты пользователя и освобождение квоты после чтения секрета.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    :param monkeypatch: фикстура для подмены атрибутов
+    """
+    monkeypatch.setattr(service, 'SECRET_QUOTA_MAX_COUNT', 1)
+    headers = create_test_auth_headers_for_user(test_user.email)
+    secret_data = {'lifetime': '5 минут', 'secret_content': 'secret_content', 'passphrase': 'passphrase'}
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert response.status_code == 201, 'Секрет не был добавлен'
+    secret_key = response.json().get('passphrase')
+
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert response.status_code == 403, 'Квота секретов не была применена'
+
+    await async_client.get(f'/api/secrets/{secret_key}', headers=headers)
+    response = await async_client.post('/api/generate/', headers=headers, json=secret_data)
+    assert response.status_code == 201, 'Квота не освободилась после чтения секрета'
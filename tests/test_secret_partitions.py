@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+from hashlib import sha256
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.secret.partitions import (DEFAULT_PARTITION, is_partitioned, create_future_partitions,
+                                   drop_expired_partitions, partition_name)
+from src.secret.storage import PostgresSecretStorage
+from tasks.tasks import maintain_partitions
+from tests.conftest import AsyncSessionLocal, engine_test
+
+
+async def test_partitions_skipped_for_plain_table():
+    """
+    Тестирует, что несекционированная таблица секретов не считается секционированной.
+    """
+    async with AsyncSessionLocal() as session:
+        assert not await is_partitioned(session)
+
+
+async def create_partitioned_secrets(session: AsyncSession) -> None:
+    """
+    Заменяет таблицу секретов секционированной по дню истечения срока жизни с партицией по умолчанию.
+
+    :param session: экземпляр сессии базы данных (тип AsyncSession)
+    """
+    await session.execute(text('DROP TABLE secrets'))
+    await session.execute(text('CREATE TABLE secrets (id SERIAL, user_id INTEGER, passphrase BYTEA NOT NULL, '
+                               'secret_content BYTEA NOT NULL, expires_at TIMESTAMP NOT NULL) '
+                               'PARTITION BY RANGE (expires_at)'))
+    await session.execute(text('CREATE TABLE secrets_default PARTITION OF secrets DEFAULT'))
+
+
+async def test_create_and_drop_partitions():
+    """
+    Тестирует создание партиций на будущие дни и удаление партиций с истекшими секретами
+    вместе с записью удаленных секретов в журнал аудита и уменьшением счетчиков пользователя.
+    """
+    await engine_test.dispose()
+    today = datetime.utcnow().date()
+    async with AsyncSessionLocal() as session:
+        await create_partitioned_secrets(session)
+        assert await is_partitioned(session)
+
+        await create_future_partitions(session, today - timedelta(days=2), days_ahead=3)
+        user_id = (await session.execute(text("INSERT INTO users (email, password) VALUES ('user@example.com', 'x') "
+                                              "RETURNING id"))).scalar()
+        await session.execute(text("INSERT INTO secrets (user_id, passphrase, secret_content, expires_at) VALUES "
+                                   "(:user_id, 'old', 'xxx', now() at time zone 'utc' - interval '1 day'), "
+                                   "(:user_id, 'new', 'x', now() at time zone 'utc')"), {'user_id': user_id})
+        await session.execute(text('INSERT INTO secret_usage VALUES (:user_id, 2, 4)'), {'user_id': user_id})
+        dropped = await drop_expired_partitions(session, datetime.utcnow(), audit_db=session)
+        assert dropped == [partition_name(today - timedelta(days=2)), partition_name(today - timedelta(days=1))]
+        query = await session.execute(text('SELECT event::text, user_id, secret_ref FROM audit_events'))
+        assert query.all() == [('secret_expire', user_id, sha256(b'old').hexdigest())], \
+            'Секреты удаленной партиции не были записаны в журнал аудита'
+        query = await session.execute(text('SELECT secret_count, total_bytes FROM secret_usage'))
+        assert query.one() == (1, 1), 'Счетчики пользователя не были уменьшены при удалении партиции'
+
+        query = await session.execute(text('SELECT count(*) FROM secrets'))
+        assert query.scalar() == 1, 'Партиция с неистекшими секретами не должна удаляться'
+        await session.commit()
+
+
+async def test_purge_expired_partitioned():
+    """
+    Тестирует, что в секционированной таблице построчно удаляются только истекшие секреты из партиции по умолчанию.
+    """
+    today = datetime.utcnow().date()
+    async with AsyncSessionLocal() as session:
+        await create_partitioned_secrets(session)
+        await create_future_partitions(session, today - timedelta(days=1), days_ahead=1)
+        await session.execute(text("INSERT INTO secrets (user_id, passphrase, secret_content, expires_at) VALUES "
+                                   "(NULL, 'partitioned', 'x', now() at time zone 'utc' - interval '1 minute'), "
+                                   "(NULL, 'default', 'x', now() at time zone 'utc' - interval '30 days')"))
+        await session.commit()
+
+        storage = PostgresSecretStorage(session)
+        assert await storage.purge_expired(datetime.utcnow()) == [(None, b'default')]
+        query = await session.execute(text('SELECT count(*) FROM secrets'))
+        assert query.scalar() == 1, 'Истекший секрет в партиции дня должен удаляться вместе с партицией'
+
+
+async def test_maintain_partitions_moves_rows_from_default():
+    """
+    Тестирует, что неистекшие секреты, попавшие в партицию по умолчанию, пока обслуживание не запускалось,
+    переносятся в созданную партицию их дня, а удаление истекших партиций при этом не блокируется.
+    """
+    today = datetime.utcnow().date()
+    async with AsyncSessionLocal() as session:
+        await create_partitioned_secrets(session)
+        await create_future_partitions(session, today - timedelta(days=1), days_ahead=0)
+        await session.execute(text("INSERT INTO secrets (user_id, passphrase, secret_content, expires_at) VALUES "
+                                   "(NULL, 'old', 'x', now() at time zone 'utc' - interval '1 day'), "
+                                   "(NULL, 'late', 'x', now() at time zone 'utc' + interval '5 days')"))
+        await session.commit()
+
+        await maintain_partitions(session, datetime.utcnow())
+        await session.commit()
+
+        query = await session.execute(text(f'SELECT passphrase FROM {partition_name(today + timedelta(days=5))}'))
+        assert query.scalars().all() == [b'late'], 'Секрет не был перенесен из партиции по умолчанию'
+        query = await session.execute(text(f'SELECT count(*) FROM {DEFAULT_PARTITION}'))
+        assert query.scalar() == 0, 'Перенесенный секрет не был удален из партиции по умолчанию'
+        query = await session.execute(text(f"SELECT to_regclass('{partition_name(today - timedelta(days=1))}')"))
+        assert query.scalar() is None, 'Партиция с истекшими секретами не была удалена'
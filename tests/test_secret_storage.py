@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+from src.secret.models import Lifetime
+from src.secret.shards import shard_metadata
+from src.secret.storage import MemorySecretStorage, PostgresSecretStorage, RedisSecretStorage, SecretUsage, \
+    ShardedSecretStorage, StoredSecret
+from src.user.models import User
+from tests.conftest import AsyncSessionLocal
+
+
+def make_secret(passphrase: bytes, lifetime: Lifetime = Lifetime.five_min, user_id: int = 1,
+                created_at: datetime = None) -> StoredSecret:
+    """
+    Создает зашифрованный секрет для тестов хранилища.
+
+    :param passphrase: ключ секрета (тип bytes)
+    :param lifetime: срок жизни секрета (тип Lifetime)
+    :param user_id: идентификатор пользователя (тип int)
+    :param created_at: время создания секрета (тип datetime)
+    :return: секрет (тип StoredSecret)
+    """
+    return StoredSecret(user_id=user_id, passphrase=passphrase, secret_content=b'content:' + passphrase,
+                        lifetime=lifetime, created_at=created_at or datetime.utcnow())
+
+
+async def test_memory_storage_take_once():
+    """
+    Тестирует однократное получение секрета из хранилища в памяти.
+    """
+    storage = MemorySecretStorage()
+    await storage.put(make_secret(b'key'))
+    assert await storage.take_once(2, b'key') is None, 'Секрет доступен только своему пользователю'
+    assert await storage.take_once(1, b'key') == b'content:key'
+    assert await storage.take_once(1, b'key') is None, 'Секрет можно получить только один раз'
+
+
+async def test_memory_storage_purge_expired():
+    """
+    Тестирует удаление истекших секретов из хранилища в памяти.
+    """
+    storage = MemorySecretStorage()
+    now = datetime.utcnow()
+    await storage.put(make_secret(b'old', created_at=now - timedelta(minutes=4)))
+    await storage.put(make_secret(b'read', created_at=now - timedelta(minutes=4)))
+    await storage.put(make_secret(b'fresh', lifetime=Lifetime.one_day))
+    assert await storage.take_once(1, b'read') == b'content:read'
+
+    assert await storage.purge_expired(now + timedelta(minutes=2)) == [(1, b'old')]
+    assert [secret.passphrase for secret in await storage.list_by_user(1)] == [b'fresh']
+
+
+async def test_memory_storage_usage():
+    """
+    Тестирует счетчики секретов пользователя в хранилище в памяти при создании, чтении и истечении.
+    """
+    storage = MemorySecretStorage()
+    now = datetime.utcnow()
+    await storage.put(make_secret(b'old', created_at=now - timedelta(minutes=4)))
+    await storage.put(make_secret(b'read'))
+    await storage.put(make_secret(b'fresh'))
+    assert await storage.usage(1) == SecretUsage(3, 3 * len(b'content:') + 12), 'Счетчики не учли новые секреты'
+
+    await storage.take_once(1, b'read')
+    await storage.purge_expired(now + timedelta(minutes=2))
+    assert await storage.usage(1) == SecretUsage(1, len(b'content:fresh')), 'Счетчики не учли удаленные секреты'
+    assert await storage.usage(2) == SecretUsage(), 'Счетчики другого пользователя не пусты'
+
+
+async def test_postgres_storage_usage(test_user: User):
+    """
+    Тестирует счетчики секретов пользователя в PostgreSQL при создании, чтении и истечении.
+
+    :param test_user: тестовый пользователь
+    """
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        storage = PostgresSecretStorage(session)
+        await storage.put(make_secret(b'old', user_id=test_user.id, created_at=now - timedelta(minutes=4)))
+        await storage.put(make_secret(b'read', user_id=test_user.id))
+        await storage.put(make_secret(b'fresh', user_id=test_user.id))
+        assert await storage.usage(test_user.id) == SecretUsage(3, 3 * len(b'content:') + 12), \
+            'Счетчики не учли новые секреты'
+
+        assert await storage.take_once(test_user.id, b'read') == b'content:read'
+        assert await storage.purge_expired(now + timedelta(minutes=2)) == [(test_user.id, b'old')]
+        assert await storage.usage(test_user.id) == SecretUsage(1, len(b'content:fresh')), \
+            'Счетчики не учли удаленные секреты'
+
+
+async def test_redis_storage_purge_expired(fake_redis):
+    """
+    Тестирует, что удаление истекших секретов в Redis возвращает ключи истекших, но не прочитанных секретов.
+
+    :param fake_redis: фикстура, подменяющая Redis на fakeredis
+    """
+    storage = RedisSecretStorage('redis://test')
+    await storage.put(make_secret(b'expired'))
+    await storage.put(make_secret(b'read'))
+    await storage.put(make_secret(b'long', lifetime=Lifetime.one_day))
+    assert await storage.take_once(1, b'read') == b'content:read'
+
+    now = datetime.utcnow()
+    assert await storage.purge_expired(now) == [], 'Неистекший секрет не должен попадать в журнал аудита'
+    assert await storage.purge_expired(now + timedelta(minutes=10)) == [(1, b'expired')]
+    assert await storage.purge_expired(now + timedelta(minutes=10)) == [], 'Истекший ключ возвращается один раз'
+    assert await storage.usage(1) == SecretUsage(2, len(b'content:expired') + len(b'content:long'))
+
+
+async def test_sharded_storage():
+    """
+    Тестирует распределение секретов по шардам: секреты пользователя хранятся в одном шарде,
+    а истекшие секреты удаляются во всех шардах.
+    """
+    shards = [MemorySecretStorage(), MemorySecretStorage(), MemorySecretStorage()]
+    storage = ShardedSecretStorage(shards)
+    now = datetime.utcnow()
+    for user_id in range(1, 13):
+        await storage.put(make_secret(b'old', user_id=user_id, created_at=now - timedelta(minutes=4)))
+        await storage.put(make_secret(b'fresh', user_id=user_id))
+
+    for user_id in range(1, 13):
+        holders = [shard for shard in shards if await shard.list_by_user(user_id)]
+        assert holders == [storage.shard_for(user_id)], 'Секреты пользователя должны храниться в одном шарде'
+        assert await storage.usage(user_id) == SecretUsage(2, len(b'content:old') + len(b'content:fresh'))
+    assert sum(1 for shard in shards if shard._secrets) > 1, 'Секреты должны распределяться по нескольким шардам'
+
+    burned_keys = await storage.purge_expired(now + timedelta(minutes=2))
+    assert sorted(burned_keys) == [(user_id, b'old') for user_id in range(1, 13)], \
+        'Истекшие секреты должны удаляться во всех шардах'
+    assert await storage.take_once(5, b'fresh') == b'content:fresh'
+    assert await storage.take_once(5, b'fresh') is None, 'Секрет можно получить только один раз'
+
+
+def test_shard_metadata_has_no_foreign_keys():
+    """
+    Тестирует, что таблицы шарда создаются без внешних ключей на таблицу пользователей основной базы данных.
+    """
+    metadata = shard_metadata()
+    assert set(metadata.tables) == {'secrets', 'secret_usage'}
+    assert all(not table.foreign_keys for table in metadata.tables.values()), 'В шарде не должно быть внешних ключей'
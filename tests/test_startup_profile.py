@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.startup_profile import StartupProfiler
+
+
+@pytest.fixture
+def profiled_package(tmp_path, monkeypatch) -> str:
+    """
+    Создает пакет, модуль которого импортирует другой модуль пакета.
+
+    :param tmp_path: временный каталог
+    :param monkeypatch: фикстура для подмены атрибутов
+    :return: имя пакета (тип str)
+    """
+    package = tmp_path / 'startup_profile_pkg'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'child.py').write_text('import time\ntime.sleep(0.02)\n')
+    (package / 'parent.py').write_text('import time\nfrom startup_profile_pkg import child\ntime.sleep(0.01)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield 'startup_profile_pkg'
+    for name in [name for name in sys.modules if name.startswith('startup_profile_pkg')]:
+        del sys.modules[name]
+
+
+def test_startup_profiler_import_times(profiled_package: str):
+    """
+    Тестирует измерение собственного и полного времени импорта модулей и шагов инициализации.
+
+    :param profiled_package: имя тестового пакета
+    """
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        with profiler.step('import parent'):
+            module = __import__(f'{profiled_package}.parent', fromlist=['parent'])
+    finally:
+        profiler.uninstall()
+
+    parent = profiler.imports[f'{profiled_package}.parent']
+    child = profiler.imports[f'{profiled_package}.child']
+    assert child.total_time >= 0.02 and parent.total_time >= 0.03
+    assert 0.01 <= parent.self_time < parent.total_time - 0.015, 'Время вложенного импорта не было вычтено'
+    assert type(module.__loader__).__name__ != '_TimedLoader', 'Исходный загрузчик модуля не был восстановлен'
+    report = profiler.report(top=None)
+    assert f'{profiled_package}.child' in report and 'import parent' in report
+
+
+def test_celery_app_imports_lazily():
+    """
+    Тестирует, что импорт приложения Celery не загружает FastAPI, модули задач и драйвер базы данных.
+    """
+    code = ('import sys, src.celery_app; '
+            'print(sorted(m for m in ("fastapi", "tasks.tasks", "asyncpg", "redis") if m in sys.modules))')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).parent.parent)
+    assert result.stdout.strip() == '[]', 'Приложение Celery загружает лишние модули при импорте'
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from src.audit.models import AuditEvent, AuditEventType
+from src.secret.models import Lifetime
+from src.secret.storage import PostgresSecretStorage, StoredSecret
+from src.user.models import User
+from tasks import runtime
+from tasks.tasks import burn_secret_async, maintain_secret_partitions_async
+from tests.conftest import AsyncSessionLocal, DATABASE_URL_TEST, engine_test
+from tests.test_secret_partitions import create_partitioned_secrets
+
+
+async def test_burn_secret_async(test_user: User):
+    """
+    Тестирует удаление истекших секретов периодической задачей и запись событий в журнал аудита.
+
+    :param test_user: тестовый пользователь
+    """
+    # типы перечислений создаются заново для каждого теста, поэтому соединения с кэшем запросов закрываются
+    await engine_test.dispose()
+    async with AsyncSessionLocal() as session:
+        storage = PostgresSecretStorage(session)
+        await storage.put(StoredSecret(user_id=test_user.id, passphrase=b'old', secret_content=b'content',
+                                       lifetime=Lifetime.five_min,
+                                       created_at=datetime.utcnow() - timedelta(minutes=10)))
+    await burn_secret_async(AsyncSessionLocal)
+
+    async with AsyncSessionLocal() as session:
+        assert await PostgresSecretStorage(session).list_by_user(test_user.id) == [], 'Истекший секрет не был удален'
+        events = (await session.execute(select(AuditEvent.event))).scalars().all()
+    assert events == [AuditEventType.secret_expire], 'Истечение секрета не было записано в журнал аудита'
+
+
+async def test_maintain_secret_partitions_in_shards(test_user: User):
+    """
+    Тестирует удаление истекших партиций в шарде секретов и запись событий истечения в журнал аудита
+    основной базы данных.
+
+    :param test_user: тестовый пользователь
+    """
+    await engine_test.dispose()
+    today = datetime.utcnow().date()
+    async with AsyncSessionLocal() as session:
+        await create_partitioned_secrets(session)
+        await session.execute(text(f"CREATE TABLE secrets_p{today - timedelta(days=1):%Y%m%d} PARTITION OF secrets "
+                                   f"FOR VALUES FROM ('{today - timedelta(days=1)}') TO ('{today}')"))
+        await session.execute(text("INSERT INTO secrets (user_id, passphrase, secret_content, expires_at) VALUES "
+                                   "(:user_id, 'old', 'x', now() at time zone 'utc' - interval '1 day')"),
+                              {'user_id': test_user.id})
+        await session.commit()
+
+    # таблица секретов тестовой базы данных играет роль шарда
+    await maintain_secret_partitions_async(AsyncSessionLocal, [AsyncSessionLocal])
+
+    async with AsyncSessionLocal() as session:
+        assert (await session.execute(text('SELECT count(*) FROM secrets'))).scalar() == 0, \
+            'Истекшая партиция шарда не была удалена'
+        events = (await session.execute(select(AuditEvent.event))).scalars().all()
+    assert events == [AuditEventType.secret_expire], 'Истечение секретов шарда не было записано в журнал аудита'
+
+
+def test_worker_runtime_reuses_loop_and_connections(monkeypatch, event_loop):
+    """
+    Тестирует, что задачи процесса воркера выполняются в одном цикле событий и используют соединения пула повторно.
+
+    :param monkeypatch: фикстура для подмены атрибутов
+    :param event_loop: цикл событий тестов, который восстанавливается после теста
+    """
+    monkeypatch.setattr(runtime, 'DATABASE_URL', DATABASE_URL_TEST)
+
+    async def query() -> tuple[asyncio.AbstractEventLoop, int]:
+        async with runtime.get_session_factory()() as session:
+            connection = await session.connection()
+            await session.execute(text('SELECT 1'))
+            return asyncio.get_running_loop(), id(connection.sync_connection.connection.dbapi_connection)
+
+    try:
+        runtime.init_worker_process()
+        first_loop, first_connection = runtime.run(query())
+        second_loop, second_connection = runtime.run(query())
+    finally:
+        runtime.shutdown_worker_process()
+        asyncio.set_event_loop(event_loop)
+    assert first_loop is second_loop, 'Задачи выполнялись в разных циклах событий'
+    assert first_connection == second_connection, 'Соединение не было использовано повторно'
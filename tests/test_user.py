@@ -84,3 +84,52 @@ async def test_delete_user(async_client: AsyncClient, test_user: User):
     response = await async_client.delete(f'/api/users/{test_user.id}',
                                          headers=create_test_auth_headers_for_user(test_user.email))
     assert response.status_code == 200, 'Не удалось найти пользователя'
+
+
+async def test_get_user_etag(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует ответ 304 на запрос пользователя с актуальным ETag и смену ETag после изменения пользователя.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    headers = create_test_auth_headers_for_user(test_user.email)
+    response = await async_client.get(f'/api/users/{test_user.id}', headers=headers)
+    etag = response.headers['etag']
+
+    response = await async_client.get(f'/api/users/{test_user.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304 and response.content == b'', 'Неизмененный пользователь был отправлен повторно'
+
+    await async_client.put(f'/api/users/{test_user.id}', headers=headers, json={'password': '222222'})
+    response = await async_client.get(f'/api/users/{test_user.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200, 'После изменения пользователя ETag не изменился'
+    assert response.headers['etag'] != etag
+
+
+async def test_get_users_etag(async_client: AsyncClient, test_user: User):
+    """
+    Тестирует ответ 304 на запрос списка пользователей с актуальным ETag и смену ETag после изменения списка.
+
+    :param async_client: асинхронный клиент для выполнения HTTP-запросов
+    :param test_user: тестовый пользователь
+    """
+    headers = create_test_auth_headers_for_user(test_user.email)
+    etag = (await async_client.get('/api/users/', headers=headers)).headers['etag']
+
+    response = await async_client.get('/api/users/', headers={**headers, 'If-None-Match': f'"other", W/{etag}'})
+    assert response.status_code == 304, 'Неизмененный список пользователей был отправлен повторно'
+    response = await async_client.get('/api/users/', headers={**headers, 'If-None-Match': etag},
+                                      params={'size': 10})
+    assert response.status_code == 200, 'ETag не зависит от параметров пагинации'
+
+    changes = [
+        ('добавления', async_client.post('/api/users/', json={'email': 'new_user@example.com', 'password': '111111'})),
+        ('изменения', async_client.put(f'/api/users/{test_user.id}', headers=headers, json={'password': '222222'})),
+        ('удаления', async_client.delete(f'/api/users/{test_user.id}', headers=headers)),
+    ]
+    other_headers = create_test_auth_headers_for_user('new_user@example.com')
+    for change, request in changes:
+        await request
+        response = await async_client.get('/api/users/', headers={**other_headers, 'If-None-Match': etag})
+        assert response.status_code == 200, f'После {change} пользователя ETag не изменился'
+        etag = response.headers['etag']